@@ -0,0 +1,8 @@
+# conftest.py
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _fast_password_hasher(settings):
+    # PBKDF2 dominates user-creating tests; MD5 is fine for throwaway test passwords
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
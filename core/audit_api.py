@@ -27,53 +27,34 @@ class Pager(LimitOffsetPagination):
     max_limit = 100
 
 
-def _best_ts(o):
-    for f in ("created_at", "timestamp", "created", "time", "ts"):
-        if hasattr(o, f):
-            return getattr(o, f)
-    return None
-
-def _best_username(o):
-    if hasattr(o, "actor") and getattr(o.actor, "username", None):
-        return o.actor.username
-    if hasattr(o, "user") and getattr(o.user, "username", None):
-        return o.user.username
-    for f in ("user_username", "actor_username", "username"):
-        if hasattr(o, f) and getattr(o, f):
-            return getattr(o, f)
-    return ""
-
-def _best_action(obj):
-    for f in ("verb", "action", "event"):
-        if hasattr(obj, f) and getattr(obj, f):
-            return getattr(obj, f)
-    return ""
+# the feed is read-only: rows are built from .values() dicts, no AuditLog/User/LPO instances
+_INV_VALUES = ("id", "entry_id", "user__username", "action", "changes", "timestamp")
+_LPO_VALUES = ("id", "lpo_id", "lpo__lpo_number", "actor__username", "verb", "payload", "created_at")
 
 
 def _inv_map(r) -> Dict[str, Any]:
     return {
-        "id": f"inv-{r.id}",
+        "id": f"inv-{r['id']}",
         "source": "inventory",
-        "entry_id": str(getattr(r, "entry_id", r.id)),
-        "entry_label": getattr(r, "entry_label", None),
-        "user_username": _best_username(r),
-        "action": _best_action(r),
-        "changes": getattr(r, "payload", getattr(r, "changes", {})) or {},
-        "timestamp": _best_ts(r),
+        "entry_id": str(r["entry_id"]),
+        "entry_label": None,
+        "user_username": r["user__username"] or "",
+        "action": r["action"] or "",
+        "changes": r["changes"] or {},
+        "timestamp": r["timestamp"],
     }
 
 
-def _lpo_map(r):
-    lpo = getattr(r, "lpo", None)
+def _lpo_map(r) -> Dict[str, Any]:
     return {
-        "id": f"lpo-{r.id}",
+        "id": f"lpo-{r['id']}",
         "source": "lpo",
-        "entry_id": str(getattr(lpo, "id", getattr(r, "lpo_id", ""))),
-        "entry_label": getattr(lpo, "lpo_number", None),
-        "user_username": _best_username(r),
-        "action": getattr(r, "verb", getattr(r, "action", getattr(r, "event", ""))),
-        "changes": getattr(r, "payload", {}) or {},
-        "timestamp": _best_ts(r),
+        "entry_id": str(r["lpo_id"]),
+        "entry_label": r["lpo__lpo_number"],
+        "user_username": r["actor__username"] or "",
+        "action": r["verb"],
+        "changes": r["payload"] or {},
+        "timestamp": r["created_at"],
     }
 
 @extend_schema(
@@ -109,7 +90,7 @@ class AuditLogsList(ListAPIView):
 
         # INVENTORY
         if src_q in ("", "inventory"):
-            inv = InvAuditLog.objects.select_related("user")  # ← was actor
+            inv = InvAuditLog.objects.all()
             if user_q:
                 inv = inv.filter(Q(user__username__icontains=user_q) | Q(user_username__icontains=user_q))
             if action_q:
@@ -117,11 +98,11 @@ class AuditLogsList(ListAPIView):
             if entry_q:
                 inv = inv.filter(Q(entry_id__icontains=entry_q) | Q(entry_label__icontains=entry_q))
             inv = inv.order_by("-created_at") if hasattr(InvAuditLog, "created_at") else inv.order_by("-id")
-            rows.extend(_inv_map(r) for r in inv[:1000])
+            rows.extend(_inv_map(r) for r in inv.values(*_INV_VALUES)[:1000])
 
         # LPO (procurement)
         if src_q in ("", "lpo"):
-            lpo = LPOAuditLog.objects.select_related("lpo", "actor")
+            lpo = LPOAuditLog.objects.all()
             if user_q:
                 lpo = lpo.filter(
                     Q(actor__username__icontains=user_q)
@@ -137,7 +118,7 @@ class AuditLogsList(ListAPIView):
                     | Q(lpo_id__in=LPO.objects.filter(lpo_number__icontains=entry_q).values("id"))
                 )
             lpo = lpo.order_by("-created_at") if hasattr(LPOAuditLog, "created_at") else lpo.order_by("-id")
-            rows.extend(_lpo_map(r) for r in lpo[:1000])
+            rows.extend(_lpo_map(r) for r in lpo.values(*_LPO_VALUES)[:1000])
 
 
         # unify ordering + paginate
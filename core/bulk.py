@@ -0,0 +1,78 @@
+# core/bulk.py
+import io, json
+
+from django.db import connections, models, router
+
+
+def _csv_field(value) -> str:
+    # COPY ... WITH CSV: an unquoted empty field is NULL, a quoted one is ''
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_row(obj, fields, connection) -> str:
+    """One CSV line (with its newline) holding `obj`'s values for `fields`, as COPY reads them."""
+    values = []
+    for f in fields:
+        value = f.pre_save(obj, add=True)
+        if value is not None:
+            if isinstance(f, models.JSONField):
+                value = json.dumps(value, cls=f.encoder)
+            else:
+                value = f.get_db_prep_save(value, connection=connection)
+        values.append(_csv_field(value))
+    return ",".join(values) + "\n"
+
+
+def copy_insert(model, objs) -> int:
+    """
+    Insert unsaved model instances with Postgres `COPY ... FROM STDIN`.
+
+    Bypasses save()/signals like bulk_create does, but skips per-statement INSERT
+    parsing entirely. Primary keys are either set client-side (e.g. UUID defaults)
+    or, for auto-increment ids, left to the database; in that case the instances'
+    pk stays None afterwards. Postgres only; callers gate on
+    `connection.vendor == "postgresql"` (or use bulk_insert()).
+    """
+    objs = list(objs)
+    if not objs:
+        return 0
+    connection = connections[router.db_for_write(model)]
+    qn = connection.ops.quote_name
+    auto = model._meta.auto_field
+    fields = [
+        f for f in model._meta.concrete_fields
+        if not (f is auto and all(obj.pk is None for obj in objs))
+    ]
+
+    buf = io.StringIO()
+    for obj in objs:
+        buf.write(_copy_row(obj, fields, connection))
+    buf.seek(0)
+
+    sql = "COPY %s (%s) FROM STDIN WITH CSV" % (
+        qn(model._meta.db_table),
+        ", ".join(qn(f.column) for f in fields),
+    )
+    with connection.cursor() as cur:
+        if hasattr(cur, "copy_expert"):  # psycopg2
+            cur.copy_expert(sql, buf)
+        else:  # psycopg 3
+            with cur.copy(sql) as copy:
+                copy.write(buf.getvalue())
+    return len(objs)
+
+
+# below this many rows a multi-row INSERT is as fast as setting up a COPY
+COPY_MIN_ROWS = 100
+
+
+def bulk_insert(model, objs, batch_size=None) -> None:
+    """COPY on Postgres for large batches, bulk_create otherwise. Auto-increment pks are not set on COPY."""
+    objs = list(objs)
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor == "postgresql" and len(objs) >= COPY_MIN_ROWS:
+        copy_insert(model, objs)
+    else:
+        model.objects.bulk_create(objs, batch_size=batch_size)
@@ -0,0 +1,75 @@
+# core/files.py
+import hashlib
+from io import BytesIO
+
+from django.core.files import File
+
+# sha256; hardware-accelerated via OpenSSL. Replaced md5: older rows keep their 32-char
+# md5 checksums, which simply never match a new digest.
+CHECKSUM_ALGO = "sha256"
+
+
+def upload_checksum(f) -> str:
+    """
+    sha256 hex digest of an uploaded file, used to dedupe attachments.
+
+    hashlib.file_digest() hashes straight from the in-memory buffer (or reads the
+    temp file into a reused buffer) instead of building bytes chunk by chunk in
+    Python. The file is left rewound for saving.
+    """
+    f.seek(0)
+    digest = hashlib.file_digest(f.file, CHECKSUM_ALGO).hexdigest()
+    f.seek(0)
+    return digest
+
+
+def jpeg_upload_name(f) -> str:
+    """The upload's file name with its extension swapped for .jpg (images are re-encoded as JPEG)."""
+    return (getattr(f, "name", "") or "upload").rsplit(".", 1)[0] + ".jpg"
+
+
+class HashingBuffer(BytesIO):
+    """BytesIO that hashes bytes as they are written (JPEG encoding only appends)."""
+    def __init__(self):
+        super().__init__()
+        self._hash = hashlib.new(CHECKSUM_ALGO)
+
+    def write(self, b):
+        self._hash.update(b)
+        return super().write(b)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def as_file(self, name: str) -> File:
+        """Wrap the encoded bytes for a FileField without copying them out first."""
+        self.seek(0)
+        return File(self, name=name)
+
+
+def load_upload_image(f, max_dim: int):
+    """
+    Decode an uploaded image and return it as RGB, downscaled to fit max_dim.
+
+    There is no separate verify() pass: Image.open() rejects unknown formats and
+    oversized (decompression bomb) headers, and a corrupt body fails during the
+    decode itself, which is re-raised as UnidentifiedImageError.
+
+    For JPEGs, draft() lets libjpeg decode at a reduced scale (1/2, 1/4, 1/8) that
+    still covers max_dim, so large photos are never fully decoded; thumbnail()
+    then does the final resample. draft() must run before load().
+    Bilinear rather than bicubic: these are attachment previews (quotes, delivery
+    notes), and thumbnail()'s reducing_gap already box-reduces large sources.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    img = Image.open(f)
+    img.draft("RGB", (max_dim, max_dim))
+    try:
+        img.load()
+        if img.mode != "RGB":  # convert() to the same mode is still a full copy
+            img = img.convert("RGB")
+    except OSError as e:
+        raise UnidentifiedImageError(f"cannot decode image: {e}") from e
+    img.thumbnail((max_dim, max_dim), Image.Resampling.BILINEAR)
+    return img
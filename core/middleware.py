@@ -3,6 +3,24 @@ from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 
 WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+HEALTH_PATHS = {"/api/health", "/api/health/"}
+
+
+class HealthCheckMiddleware:
+    """
+    Answer liveness probes before URL resolution and the rest of the stack.
+    Listed right after CorsMiddleware so browser checks still get CORS headers;
+    core.health.HealthView stays routed for other methods and the schema.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path in HEALTH_PATHS and request.method in ("GET", "HEAD"):
+            return JsonResponse({"status": "ok"})
+        return self.get_response(request)
+
 
 class BlockInventoryWritesForNonSuperuser(MiddlewareMixin):
     """
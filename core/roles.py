@@ -14,4 +14,35 @@ def is_manager_or_owner(user) -> bool:
     return is_owner(user) or in_groups(user, "Manager")
 
 def is_staff_or_manager_or_owner(user) -> bool:
-    return is_owner(user) or in_groups(user, "Manager", "Staff")
\ No newline at end of file
+    return is_owner(user) or in_groups(user, "Manager", "Staff")
+
+# Per-request variants: a request's permission classes (and OR/AND compositions of
+# them) ask the same role questions repeatedly; resolve the user's roles once into a
+# bitmask kept on the request, then every check is an integer AND.
+ROLE_OWNER, ROLE_MANAGER, ROLE_STAFF = 1, 2, 4
+
+_GROUP_ROLES = {"manager": ROLE_MANAGER, "staff": ROLE_STAFF}
+
+_ROLE_MASKS = {
+    "owner": ROLE_OWNER,
+    "manager_or_owner": ROLE_OWNER | ROLE_MANAGER,
+    "staff_or_manager_or_owner": ROLE_OWNER | ROLE_MANAGER | ROLE_STAFF,
+}
+
+def request_role_mask(request) -> int:
+    mask = getattr(request, "_role_mask", None)
+    if mask is None:
+        user = request.user
+        mask = 0
+        if user and user.is_authenticated:
+            if user.is_superuser:
+                # every role check passes for the owner; no need to look at groups
+                mask = ROLE_OWNER | ROLE_MANAGER | ROLE_STAFF
+            else:
+                for name in user.groups.values_list("name", flat=True):
+                    mask |= _GROUP_ROLES.get(name.lower(), 0)
+        request._role_mask = mask
+    return mask
+
+def role_for(request, role: str) -> bool:
+    return bool(request_role_mask(request) & _ROLE_MASKS[role])
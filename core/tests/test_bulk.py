@@ -0,0 +1,41 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+
+from core.bulk import _copy_row
+from inventory.models import AuditLog, InventoryEntry
+
+
+@pytest.fixture
+def pg():
+    # a Postgres wrapper is only used for its value adaptation; it never connects
+    pytest.importorskip("psycopg2")
+    from django.db.backends.postgresql.base import DatabaseWrapper
+    return DatabaseWrapper({**connection.settings_dict, "ENGINE": "django.db.backends.postgresql"})
+
+
+def _fields(model, *names):
+    return [model._meta.get_field(n) for n in names]
+
+
+def test_copy_row_encodes_values(pg):
+    pk = uuid.UUID("12345678-1234-5678-1234-567812345678")
+    entry = InventoryEntry(
+        id=pk, date=datetime.date(2026, 1, 2), truck_registration='AB "12"',
+        quantity=Decimal("12.500"), gross_weight=None, comment="",
+    )
+    fields = _fields(InventoryEntry, "id", "date", "truck_registration", "quantity", "gross_weight", "comment")
+    assert _copy_row(entry, fields, pg) == (
+        '"12345678-1234-5678-1234-567812345678","2026-01-02","AB ""12""","12.500",,""\n'
+    )
+
+
+def test_copy_row_encodes_json(pg):
+    log = AuditLog(entry_id=uuid.uuid4(), action="create", changes={"qty": "1.5", "tags": [None]})
+    assert _copy_row(log, _fields(AuditLog, "changes"), pg) == '"{""qty"": ""1.5"", ""tags"": [null]}"\n'
+    # SQL NULL, not the JSON literal null
+    log.changes = None
+    assert _copy_row(log, _fields(AuditLog, "changes"), pg) == "\n"
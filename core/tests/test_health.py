@@ -0,0 +1,19 @@
+from unittest import mock
+
+import pytest
+
+from core.health import HealthView
+
+
+@pytest.mark.parametrize("path", ["/api/health", "/api/health/"])
+def test_probe_answered_by_middleware(client, path):
+    # the view (and URL resolution) is never reached for GET/HEAD
+    with mock.patch.object(HealthView, "get", side_effect=AssertionError("reached the view")):
+        r = client.get(path)
+        assert r.status_code == 200
+        assert r.json() == {"status": "ok"}
+        assert client.head(path).status_code == 200
+
+
+def test_other_methods_fall_through_to_the_view(client):
+    assert client.post("/api/health/").status_code == 405
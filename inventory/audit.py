@@ -0,0 +1,48 @@
+# inventory/audit.py
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from .models import AuditLog
+
+AUDIT_BATCH_SIZE = 1000
+
+# AuditLog rows queued by the current request; None when no deferred() block is open
+_pending: ContextVar[list[AuditLog] | None] = ContextVar("inventory_audit_pending", default=None)
+
+
+def log(entry, user, action: str, changes=None) -> None:
+    """
+    Record an audit event for `entry`. Inside `deferred()` the row is queued and
+    written with the rest of the request's events; otherwise it is saved right away.
+    """
+    row = AuditLog(entry=entry, user=user, action=action, changes=changes)
+    pending = _pending.get()
+    if pending is None:
+        row.save()
+    else:
+        pending.append(row)
+
+
+@contextmanager
+def deferred():
+    """
+    Run the block in a transaction, buffering `log()` calls and writing them with one
+    bulk INSERT before it commits.
+
+    The business writes and their audit rows commit together: a failed flush rolls
+    the writes back, and nothing is written when the block is marked for rollback
+    (DRF's exception handler does that for errors it turns into responses).
+    """
+    token = _pending.set([])
+    try:
+        with transaction.atomic():
+            yield
+            rows = _pending.get()
+            if rows and not transaction.get_connection().needs_rollback:
+                AuditLog.objects.bulk_create(rows, batch_size=AUDIT_BATCH_SIZE)
+    finally:
+        _pending.reset(token)
@@ -0,0 +1,24 @@
+# inventory/import_utils.py
+from __future__ import annotations
+
+from django.core.exceptions import ValidationError
+
+from .models import InventoryEntry
+
+# FK checks would cost a query per row; the importing user is known to exist
+_SKIP_CLEAN = ("created_by", "modified_by")
+
+
+def normalize_row(payload: dict, user=None) -> tuple[InventoryEntry | None, dict]:
+    """
+    Build an unsaved InventoryEntry from an import payload and validate it with the
+    model's own rules (choices, lengths, decimal places, clean()) instead of a DRF
+    serializer per row. Returns (instance, {}) or (None, {field: [messages]}).
+    """
+    data = {k: v.strip() if isinstance(v, str) else v for k, v in payload.items()}
+    obj = InventoryEntry(**data, created_by=user)
+    try:
+        obj.full_clean(exclude=_SKIP_CLEAN, validate_unique=False)
+    except ValidationError as e:
+        return None, e.message_dict
+    return obj, {}
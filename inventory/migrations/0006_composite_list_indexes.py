@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_inventoryattachment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryentry',
+            index=models.Index(fields=['deleted', 'status', '-date'], name='inv_deleted_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 00:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_composite_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventoryattachment',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
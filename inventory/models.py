@@ -62,6 +62,8 @@ class InventoryEntry(models.Model):
         ordering = ["-date", "-created_at"]
         indexes = [
             models.Index(fields=["deleted", "date"]),
+            # list/summary/export filter on deleted + status and order by newest date
+            models.Index(fields=["deleted", "status", "-date"], name="inv_deleted_status_date_idx"),
         ]
 
     def clean(self):
@@ -97,7 +99,7 @@ class InventoryAttachment(models.Model):
     size_kb = models.DecimalField(max_digits=10, decimal_places=1, default=0)
     width = models.PositiveIntegerField(null=True, blank=True)
     height = models.PositiveIntegerField(null=True, blank=True)
-    checksum = models.CharField(max_length=32, blank=True)
+    checksum = models.CharField(max_length=64, blank=True)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
@@ -1,6 +1,6 @@
 # inventory/permissions.py
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from core.roles import is_owner, is_staff_or_manager_or_owner, in_groups
+from core.roles import is_owner, in_groups, role_for
 
 def in_group(user, *names: str) -> bool:
     # keep a short alias for views that already import `in_group` from inventory.permissions
@@ -19,7 +19,7 @@ class InventoryWritePolicy(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         if request.method == "POST":
-            return user.is_superuser or in_group(user, "Manager", "Staff")
+            return role_for(request, "staff_or_manager_or_owner")
         return user.is_superuser
 
     def has_object_permission(self, request, view, obj):
@@ -42,7 +42,7 @@ class InventoryCreatePolicy(BasePermission):
     """
     def has_permission(self, request, view):
         if request.method == "POST":
-            return is_staff_or_manager_or_owner(getattr(request, "user", None))
+            return role_for(request, "staff_or_manager_or_owner")
         return False
 
 # class InventoryNewAllowed(BasePermission):
@@ -1,5 +1,7 @@
 # procurement/admin.py
 from django.contrib import admin
+from django.db import models
+from django.utils import timezone
 from .models import Supplier, LPO, LPOItem, LPOAttachment, GoodsReceipt, GoodsReceiptItem
 
 class LPOItemInline(admin.TabularInline):
@@ -30,21 +32,25 @@ class LPOAdmin(admin.ModelAdmin):
 
     @admin.action(description="Submit selected LPOs")
     def mark_submitted(self, request, queryset):
-        for lpo in queryset:
-            if lpo.status == LPO.STATUS_DRAFT:
-                lpo.submit(request.user); lpo.save(update_fields=["status","submitted_at"])
+        # same rules as LPO.submit(), applied in one UPDATE
+        queryset.filter(
+            models.Exists(LPOItem.objects.filter(lpo=models.OuterRef("pk"))),
+            status=LPO.STATUS_DRAFT, grand_total__gt=0,
+        ).update(status=LPO.STATUS_SUBMITTED, submitted_by=request.user,
+                 submitted_at=timezone.now(), updated_at=timezone.now())
 
     @admin.action(description="Approve selected LPOs")
     def mark_approved(self, request, queryset):
-        for lpo in queryset:
-            if lpo.status == LPO.STATUS_SUBMITTED:
-                lpo.approve(request.user); lpo.save(update_fields=["status","approved_at","approved_by"])
+        # per-row save: approve() validates each LPO and the post_save signal queues the supplier
+        # email (which loads what the PDF needs itself); the items prefetch answers approve()'s
+        # items.exists() check for every selected LPO in one query
+        for lpo in queryset.filter(status=LPO.STATUS_SUBMITTED).prefetch_related("items"):
+            lpo.approve(request.user); lpo.save(update_fields=["status","approved_at","approved_by"])
 
     @admin.action(description="Cancel selected LPOs")
     def mark_cancelled(self, request, queryset):
-        for lpo in queryset:
-            if lpo.status not in (LPO.STATUS_CANCELLED, LPO.STATUS_FULFILLED):
-                lpo.cancel(request.user); lpo.save(update_fields=["status"])
+        queryset.exclude(status__in=(LPO.STATUS_CANCELLED, LPO.STATUS_FULFILLED)).update(
+            status=LPO.STATUS_CANCELLED, updated_at=timezone.now())
 
 class GoodsReceiptItemInline(admin.TabularInline):
     model = GoodsReceiptItem
@@ -3,7 +3,8 @@ from __future__ import annotations
 from django.core.mail import EmailMessage
 from django.conf import settings
 
-def send_lpo_pdf_to_supplier(*, supplier_email: str, subject: str, body: str, pdf_bytes: bytes, filename: str = "lpo.pdf") -> None:
+def send_lpo_pdf_to_supplier(*, supplier_email: str, subject: str, body: str, pdf_bytes: bytes | None, filename: str = "lpo.pdf") -> None:
+    """Email the supplier; `pdf_bytes` is attached when given (None when the body links to the PDF)."""
     if not supplier_email:
         return
     email = EmailMessage(
@@ -12,5 +13,6 @@ def send_lpo_pdf_to_supplier(*, supplier_email: str, subject: str, body: str, pd
         from_email=getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@example.com"),
         to=[supplier_email],
     )
-    email.attach(filename, pdf_bytes, "application/pdf")
+    if pdf_bytes is not None:
+        email.attach(filename, pdf_bytes, "application/pdf")
     email.send(fail_silently=True)  # tweak to False in prod if you want exceptions
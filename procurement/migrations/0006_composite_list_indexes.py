@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0005_lpo_submitted_by'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lpo',
+            index=models.Index(fields=['status', '-created_at'], name='lpo_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lpo',
+            index=models.Index(fields=['supplier', 'status'], name='lpo_supplier_status_idx'),
+        ),
+    ]
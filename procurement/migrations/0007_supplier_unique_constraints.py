@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:15
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def merge_duplicate_suppliers(apps, schema_editor):
+    # rows that would violate any of the constraints below are the same supplier entered
+    # twice: keep the oldest of each group and move the others' LPOs onto it
+    Supplier = apps.get_model("procurement", "Supplier")
+    LPO = apps.get_model("procurement", "LPO")
+    parent = {}
+
+    def find(pk):
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    owner = {}
+    rows = Supplier.objects.order_by("pk").values_list("pk", "name", "phone", "email", "rc_number", "tax_id")
+    for pk, name, phone, email, rc, tin in rows.iterator():
+        parent[pk] = pk
+        keys = []
+        if phone:
+            keys.append(("name_phone", name.lower(), phone))
+        if email:
+            keys.append(("name_email", name.lower(), email.lower()))
+        if rc:
+            keys.append(("rc", rc.upper()))
+        if tin:
+            keys.append(("tin", tin.upper()))
+        for key in keys:
+            if key in owner:
+                a, b = find(owner[key]), find(pk)
+                parent[max(a, b)] = min(a, b)
+            else:
+                owner[key] = pk
+
+    merged = {}
+    for pk in parent:
+        keep = find(pk)
+        if keep != pk:
+            merged.setdefault(keep, []).append(pk)
+    for keep, dupes in merged.items():
+        LPO.objects.filter(supplier_id__in=dupes).update(supplier_id=keep)
+        Supplier.objects.filter(pk__in=dupes).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0006_composite_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_suppliers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='supplier',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('phone'), condition=models.Q(('phone', ''), _negated=True), name='uniq_supplier_name_phone'),
+        ),
+        migrations.AddConstraint(
+            model_name='supplier',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), django.db.models.functions.text.Lower('email'), condition=models.Q(('email', ''), _negated=True), name='uniq_supplier_name_email'),
+        ),
+        migrations.AddConstraint(
+            model_name='supplier',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('rc_number'), condition=models.Q(('rc_number', ''), _negated=True), name='uniq_supplier_rc_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='supplier',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('tax_id'), condition=models.Q(('tax_id', ''), _negated=True), name='uniq_supplier_tax_id'),
+        ),
+    ]
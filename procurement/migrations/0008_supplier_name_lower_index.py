@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0007_supplier_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplier',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='supplier_name_lower_idx'),
+        ),
+    ]
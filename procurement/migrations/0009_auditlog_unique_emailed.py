@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def delete_duplicate_emailed(apps, schema_editor):
+    # the old exists-then-create claim could race and log an LPO as emailed twice;
+    # keep the earliest row per LPO so the constraint can be created
+    AuditLog = apps.get_model("procurement", "AuditLog")
+    seen = set()
+    dupes = []
+    rows = AuditLog.objects.filter(verb="emailed", lpo__isnull=False).order_by("pk").values_list("pk", "lpo_id")
+    for pk, lpo_id in rows.iterator():
+        if lpo_id in seen:
+            dupes.append(pk)
+        else:
+            seen.add(lpo_id)
+    AuditLog.objects.filter(pk__in=dupes).delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0008_supplier_name_lower_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_emailed, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='auditlog',
+            constraint=models.UniqueConstraint(condition=models.Q(('verb', 'emailed')), fields=('lpo', 'verb'), name='uniq_auditlog_lpo_emailed'),
+        ),
+    ]
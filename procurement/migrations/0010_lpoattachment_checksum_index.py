@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0009_auditlog_unique_emailed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lpoattachment',
+            index=models.Index(fields=['lpo', 'checksum'], name='lpoatt_lpo_checksum_idx'),
+        ),
+    ]
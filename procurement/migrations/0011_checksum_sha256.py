@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 00:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0010_lpoattachment_checksum_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lpoattachment',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
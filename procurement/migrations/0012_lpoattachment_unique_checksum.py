@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-16 00:25
+
+from django.db import migrations, models
+
+
+def clear_duplicate_checksums(apps, schema_editor):
+    # uploads racing past the dedupe lookup may have stored the same file twice;
+    # keep the oldest row's checksum so the constraint can be created
+    LPOAttachment = apps.get_model("procurement", "LPOAttachment")
+    seen = set()
+    dupes = []
+    rows = LPOAttachment.objects.exclude(checksum="").order_by("pk").values_list("pk", "lpo_id", "checksum")
+    for pk, lpo_id, checksum in rows.iterator():
+        if (lpo_id, checksum) in seen:
+            dupes.append(pk)
+        else:
+            seen.add((lpo_id, checksum))
+    LPOAttachment.objects.filter(pk__in=dupes).update(checksum="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0011_checksum_sha256'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='lpoattachment',
+            name='lpoatt_lpo_checksum_idx',
+        ),
+        migrations.RunPython(clear_duplicate_checksums, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lpoattachment',
+            constraint=models.UniqueConstraint(condition=models.Q(('checksum', ''), _negated=True), fields=('lpo', 'checksum'), name='uniq_lpoatt_lpo_checksum'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0012_lpoattachment_unique_checksum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplier',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
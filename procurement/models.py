@@ -5,9 +5,13 @@ from decimal import Decimal
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import Lower, Upper
 from django.utils import timezone
 
+from core.bulk import bulk_insert
+
 User = settings.AUTH_USER_MODEL
+LPO_ITEM_BATCH_SIZE = 500
 
 
 class Supplier(models.Model):
@@ -20,6 +24,7 @@ class Supplier(models.Model):
     tax_id = models.CharField(max_length=64, blank=True)
     contact_person = models.CharField(max_length=128, blank=True)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)  # part of the LPO PDF cache key
 
     class Meta:
         indexes = [
@@ -28,6 +33,19 @@ class Supplier(models.Model):
             models.Index(fields=["email"]),
             models.Index(fields=["rc_number"]),
             models.Index(fields=["tax_id"]),
+            # case-insensitive name lookups (LPO supplier_name resolution)
+            models.Index(Lower("name"), name="supplier_name_lower_idx"),
+        ]
+        # duplicate guards, case-insensitive; blank contact/registration values never conflict
+        constraints = [
+            models.UniqueConstraint(Lower("name"), "phone", condition=~models.Q(phone=""),
+                                    name="uniq_supplier_name_phone"),
+            models.UniqueConstraint(Lower("name"), Lower("email"), condition=~models.Q(email=""),
+                                    name="uniq_supplier_name_email"),
+            models.UniqueConstraint(Upper("rc_number"), condition=~models.Q(rc_number=""),
+                                    name="uniq_supplier_rc_number"),
+            models.UniqueConstraint(Upper("tax_id"), condition=~models.Q(tax_id=""),
+                                    name="uniq_supplier_tax_id"),
         ]
 
     def __str__(self): return f"{self.name} · {self.supplier_code}"
@@ -90,7 +108,12 @@ class LPO(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["status"])]
+        indexes = [
+            models.Index(fields=["status"]),
+            # LPO list: status / supplier filters, newest first
+            models.Index(fields=["status", "-created_at"], name="lpo_status_created_idx"),
+            models.Index(fields=["supplier", "status"], name="lpo_supplier_status_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.lpo_number} · {self.supplier.name}"
@@ -100,14 +123,20 @@ class LPO(models.Model):
     def is_editable(self) -> bool:
         return self.status in {self.STATUS_DRAFT, self.STATUS_SUBMITTED}
 
-    def recompute_totals(self) -> None:
-        subtotal = sum((li.line_total for li in self.items.all()), Decimal("0.00"))
+    def recompute_totals(self, subtotal: Decimal | None = None) -> None:
+        # callers that already know the lines pass their subtotal and skip the aggregate
+        if subtotal is None:
+            subtotal = self.items.aggregate(s=models.Sum("line_total"))["s"] or Decimal("0.00")
         self.subtotal = subtotal
         self.grand_total = subtotal + self.tax_amount - self.discount_amount
 
     def refresh_receive_status(self) -> None:
-        total_ordered = sum((i.qty for i in self.items.all()), Decimal("0"))
-        total_received = sum((i.total_received for i in self.items.all()), Decimal("0"))
+        # two aggregates rather than one joined query: joining receipts would repeat each item's qty
+        total_ordered = self.items.aggregate(s=models.Sum("qty"))["s"] or Decimal("0")
+        total_received = (
+            GoodsReceiptItem.objects.filter(lpo_item__lpo=self)
+            .aggregate(s=models.Sum("qty_received"))["s"] or Decimal("0")
+        )
         if total_received == 0:
             return
         if total_received >= total_ordered:
@@ -118,7 +147,7 @@ class LPO(models.Model):
     def submit(self, user) -> None:
         if self.status != self.STATUS_DRAFT:
             raise ValueError("Only draft LPO can be submitted.")
-        if self.items.count() == 0 or self.grand_total <= 0:
+        if self.grand_total <= 0 or not self.items.exists():
             raise ValueError("Cannot submit without items and totals.")
         self.status = self.STATUS_SUBMITTED
         self.submitted_by = user                 # ← NEW
@@ -127,7 +156,7 @@ class LPO(models.Model):
     def approve(self, user) -> None:
         if self.status != self.STATUS_SUBMITTED:
             raise ValueError("Only submitted LPO can be approved.")
-        if self.items.count() == 0 or self.grand_total <= 0:
+        if self.grand_total <= 0 or not self.items.exists():
             raise ValueError("Cannot approve an empty LPO.")
         self.status = self.STATUS_APPROVED
         self.approved_by = user
@@ -159,11 +188,63 @@ class LPOItem(models.Model):
         self.line_total = (self.qty or 0) * (self.unit_price or 0)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def bulk_create_for(cls, lpo: LPO, items_data) -> list[LPOItem]:
+        """Insert an LPO's lines in one statement (COPY for large orders); save() is skipped, so line_total is set here."""
+        items = [cls(lpo=lpo, **{k: v for k, v in data.items() if k != "id"}) for data in items_data]
+        for item in items:
+            item.line_total = (item.qty or 0) * (item.unit_price or 0)
+        bulk_insert(cls, items, batch_size=LPO_ITEM_BATCH_SIZE)
+        return items
+
+    @classmethod
+    def sync_for(cls, lpo: LPO, items_data) -> None:
+        """
+        Replace an LPO's lines with `items_data` in place: entries carrying the id of an
+        existing line update it (only when something changed), the rest are inserted,
+        and lines missing from the list are deleted.
+        """
+        existing = {item.pk: item for item in lpo.items.all()}
+        to_update, to_create = [], []
+        for data in items_data:
+            item = existing.pop(data.get("id"), None)
+            if item is None:
+                to_create.append(data)
+                continue
+            new = {
+                "inventory_item_id": getattr(data.get("inventory_item"), "pk", None),
+                "description": data.get("description", ""),
+                "qty": data["qty"],
+                "unit_price": data["unit_price"],
+            }
+            if any(getattr(item, k) != v for k, v in new.items()):
+                for k, v in new.items():
+                    setattr(item, k, v)
+                item.line_total = (item.qty or 0) * (item.unit_price or 0)
+                to_update.append(item)
+
+        if existing:
+            cls.objects.filter(pk__in=existing).delete()
+        if to_update:
+            cls.objects.bulk_update(
+                to_update, ["inventory_item", "description", "qty", "unit_price", "line_total"],
+                batch_size=LPO_ITEM_BATCH_SIZE,
+            )
+        cls.bulk_create_for(lpo, to_create)
+
     @property
     def total_received(self) -> Decimal:
+        # use the `received_total` annotation when the queryset provides one (see with_received)
+        if "received_total" in self.__dict__:
+            return self.received_total or Decimal("0")
         agg = self.receipts.aggregate(s=models.Sum("qty_received"))["s"]
         return agg or Decimal("0")
 
+    @classmethod
+    def with_received(cls):
+        """Items annotated with their received quantity, for prefetching under an LPO."""
+        return cls.objects.annotate(received_total=models.Sum("receipts__qty_received"))
+
 
 class LPOAttachment(models.Model):
     KIND_CHOICES = [("quotation", "Quotation"), ("spec", "Spec"), ("other", "Other")]
@@ -174,9 +255,19 @@ class LPOAttachment(models.Model):
     size_kb = models.DecimalField(max_digits=10, decimal_places=1, default=0)
     width = models.PositiveIntegerField(null=True, blank=True)
     height = models.PositiveIntegerField(null=True, blank=True)
-    checksum = models.CharField(max_length=32, blank=True)
+    checksum = models.CharField(max_length=64, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # upload dedupe: filter(lpo=..., checksum=...); also backs that lookup
+        constraints = [
+            models.UniqueConstraint(
+                fields=["lpo", "checksum"],
+                condition=~models.Q(checksum=""),
+                name="uniq_lpoatt_lpo_checksum",
+            )
+        ]
+
 
 class GoodsReceipt(models.Model):
     lpo = models.ForeignKey(LPO, on_delete=models.PROTECT, related_name="grns")
@@ -212,4 +303,11 @@ class AuditLog(models.Model):
     lpo = models.ForeignKey(LPO, null=True, blank=True, on_delete=models.CASCADE)
     grn = models.ForeignKey(GoodsReceipt, null=True, blank=True, on_delete=models.CASCADE)
     payload = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # an LPO is emailed to its supplier at most once (see tasks.email_approved_lpo)
+            models.UniqueConstraint(fields=["lpo", "verb"], condition=models.Q(verb="emailed"),
+                                    name="uniq_auditlog_lpo_emailed"),
+        ]
@@ -1,6 +1,6 @@
 # procurement/permissions.py
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from core.roles import in_groups, is_owner, is_manager_or_owner
+from core.roles import role_for
 
 class LPOPolicy(BasePermission):
     """
@@ -14,22 +14,21 @@ class LPOPolicy(BasePermission):
         if request.method in SAFE_METHODS:
             # list vs retrieve differs: we check view.action
             if getattr(view, "action", None) == "list":
-                return is_manager_or_owner(request.user)
+                return role_for(request, "manager_or_owner")
             # allow retrieve to pass into object-level check
             return bool(request.user and request.user.is_authenticated)
 
         if request.method == "POST":
             # anyone in the org roles can create
-            from core.roles import is_staff_or_manager_or_owner
-            return is_staff_or_manager_or_owner(request.user)
+            return role_for(request, "staff_or_manager_or_owner")
 
         # edits default to owner-only (keeps your stricter rule)
-        return is_owner(request.user)
+        return role_for(request, "owner")
 
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             # managers/owner see any; staff can see only what they created
-            return is_manager_or_owner(request.user) or (obj.created_by_id == request.user.id)
+            return role_for(request, "manager_or_owner") or (obj.created_by_id == request.user.id)
         # non-safe: defer to has_permission outcome
         return self.has_permission(request, view)
 
@@ -41,7 +40,7 @@ class LPOReadPolicy(BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
-            if is_owner(request.user) or in_groups(request.user, "Manager"):
+            if role_for(request, "manager_or_owner"):
                 return True
             return obj.created_by_id == request.user.id
         return True  # non-safe handled elsewhere
@@ -51,11 +50,17 @@ class LPOWritePolicy(BasePermission):
     - Owner/Manager: can update/approve
     - Staff: can update/submit only their own LPO while in 'draft'
     """
+    MESSAGES = {"submit": "You cannot submit this LPO.", "destroy": "You cannot delete this LPO."}
+
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
-        if is_owner(request.user) or in_groups(request.user, "Manager"):
+        if role_for(request, "manager_or_owner"):
             return True
         # staff: only their own draft on non-safe methods
-        return obj.created_by_id == request.user.id and getattr(obj, "status", "") == "draft"
+        allowed = obj.created_by_id == request.user.id and getattr(obj, "status", "") == "draft"
+        if not allowed:
+            # DRF reads .message off this instance when it raises PermissionDenied
+            self.message = self.MESSAGES.get(getattr(view, "action", None), "You cannot modify this LPO.")
+        return allowed
     
\ No newline at end of file
@@ -1,7 +1,13 @@
 # procurement/serializers.py
 from __future__ import annotations
+import uuid
+from collections import defaultdict
 from decimal import Decimal
+from functools import cached_property
 
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch
+from django.db.models.functions import Lower
 from rest_framework import serializers
 
 from inventory.models import InventoryEntry
@@ -10,7 +16,13 @@ from .models import (
     GoodsReceipt, GoodsReceiptItem,
 )
 from drf_spectacular.utils import extend_schema_field, OpenApiTypes
-from core.roles import is_manager_or_owner  
+from core.bulk import bulk_insert
+from core.roles import role_for
+
+CENT = Decimal("0.01")
+# LPO states that accept goods receipts / that can no longer be cancelled
+_RECEIVE_STATUSES = frozenset({LPO.STATUS_APPROVED, LPO.STATUS_PARTIAL})
+_CLOSED_STATUSES = frozenset({LPO.STATUS_CANCELLED, LPO.STATUS_FULFILLED})
 
 # =========================
 # Supplier
@@ -24,33 +36,38 @@ class SupplierSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "supplier_code"]
 
-    def validate(self, attrs):
-        # Soft duplicate guard (portable across SQLite/Postgres)
-        name = (attrs.get("name") or "").strip()
-        phone = (attrs.get("phone") or "").strip()
-        email = (attrs.get("email") or "").strip().lower()
-        rc = (attrs.get("rc_number") or "").strip().upper()
-        tin = (attrs.get("tax_id") or "").strip().upper()
-
-        qs = Supplier.objects.all()
-        if self.instance:
-            qs = qs.exclude(pk=self.instance.pk)
-
-        if name:
-            if phone and qs.filter(name__iexact=name, phone=phone).exists():
-                raise serializers.ValidationError("Supplier with same name & phone already exists.")
-            if email and qs.filter(name__iexact=name, email__iexact=email).exists():
-                raise serializers.ValidationError("Supplier with same name & email already exists.")
-        if rc and qs.filter(rc_number__iexact=rc).exists():
-            raise serializers.ValidationError("RC number already exists for another supplier.")
-        if tin and qs.filter(tax_id__iexact=tin).exists():
-            raise serializers.ValidationError("Tax ID already exists for another supplier.")
-        return attrs
+    # Duplicates are rejected by Supplier's unique constraints; the violated constraint
+    # picks the message, so a write costs no extra lookup and is race-free.
+    DUPLICATE_ERRORS = {
+        "uniq_supplier_name_phone": "Supplier with same name & phone already exists.",
+        "uniq_supplier_name_email": "Supplier with same name & email already exists.",
+        "uniq_supplier_rc_number": "RC number already exists for another supplier.",
+        "uniq_supplier_tax_id": "Tax ID already exists for another supplier.",
+    }
+
+    def _duplicate_error(self, exc: IntegrityError) -> serializers.ValidationError | None:
+        diag = getattr(exc.__cause__, "diag", None)  # psycopg exposes the constraint name
+        where = getattr(diag, "constraint_name", None) or str(exc)
+        for constraint, message in self.DUPLICATE_ERRORS.items():
+            if constraint in where:
+                return serializers.ValidationError(message)
+        return None
 
     def create(self, validated_data):
         from .services import next_supplier_code
-        validated_data["supplier_code"] = next_supplier_code()
-        return super().create(validated_data)
+        try:
+            with transaction.atomic():
+                validated_data["supplier_code"] = next_supplier_code()
+                return super().create(validated_data)
+        except IntegrityError as e:
+            raise self._duplicate_error(e) or e
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as e:
+            raise self._duplicate_error(e) or e
 
 
 # =========================
@@ -60,13 +77,35 @@ from decimal import Decimal as D
 from rest_framework import serializers
 # ...imports...
 
+# LPOItemSerializer.validate reads these to default a line's description
+_INVENTORY_LOOKUP_FIELDS = ("id", "description", "mineral_or_equipment")
+
+
+class InventoryItemField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves ids from the map LPOSerializer.to_internal_value loads for all lines in
+    one query; ids missing from it (or standalone use) fall back to the normal lookup.
+    """
+
+    def to_internal_value(self, data):
+        cache = getattr(self.root, "_inventory_items", None)
+        if cache:
+            try:
+                return cache[uuid.UUID(str(data))]
+            except (KeyError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
 class LPOItemSerializer(serializers.ModelSerializer):
-    inventory_item = serializers.PrimaryKeyRelatedField(
-        queryset=InventoryEntry.objects.all(),
+    inventory_item = InventoryItemField(
+        queryset=InventoryEntry.objects.only(*_INVENTORY_LOOKUP_FIELDS),
         required=False,
         allow_null=True,
     )
     description = serializers.CharField(required=False, allow_blank=True)
+    # writable so an LPO update can send existing lines back and have them edited in place
+    id = serializers.IntegerField(required=False)
 
     # READ-ONLY computed fields
     total_received = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)  # <-- NO source
@@ -79,7 +118,7 @@ class LPOItemSerializer(serializers.ModelSerializer):
             "id","inventory_item", "description","qty","unit_price","line_total",
             "total_received",  "received_so_far",  "remaining",          
         ]
-        read_only_fields = ["id", "line_total", "total_received", "received_so_far", "remaining"]
+        read_only_fields = ["line_total", "total_received", "received_so_far", "remaining"]
 
     def to_internal_value(self, data):
         d = dict(data)
@@ -109,6 +148,10 @@ class LPOItemSerializer(serializers.ModelSerializer):
 # =========================
 # LPO (header)
 # =========================
+# every LPO column is rendered; of the joined users only what get_*_by_name() reads
+_LPO_COLUMNS = tuple(f.name for f in LPO._meta.concrete_fields)
+_USER_NAME_FIELDS = ("username", "first_name", "last_name", "email")
+
 class LPOSerializer(serializers.ModelSerializer):
     # Make supplier optional so we can accept supplier_name
     supplier = serializers.PrimaryKeyRelatedField(
@@ -119,7 +162,7 @@ class LPOSerializer(serializers.ModelSerializer):
     items = LPOItemSerializer(many=True)
     # allow typing the supplier name; we resolve/create in create/update
     supplier_name = serializers.CharField(write_only=True, required=False, allow_blank=True)
-    supplier_name_display = serializers.CharField(source="supplier.name", read_only=True)
+    supplier_name_display = serializers.SerializerMethodField(read_only=True)
 
     created_by_name = serializers.SerializerMethodField(read_only=True)
     submitted_by = serializers.PrimaryKeyRelatedField(read_only=True)                 # ← NEW
@@ -155,15 +198,36 @@ class LPOSerializer(serializers.ModelSerializer):
             "can_submit", "can_approve", "can_cancel", "can_receive",
         ]
 
+    @staticmethod
+    def setup_eager_loading(qs):
+        """
+        Load everything the representation touches: the creator/submitter (for their
+        names), the supplier's name and the items with their received totals.
+        supplier and approved_by are only rendered as ids, so they aren't joined, and
+        the joined users skip the columns nothing reads (password hash, flags, dates).
+        """
+        return (
+            qs.select_related("created_by", "submitted_by")
+            .only(*_LPO_COLUMNS, *(f"{rel}__{f}" for rel in ("created_by", "submitted_by") for f in _USER_NAME_FIELDS))
+            .annotate(supplier_display_name=F("supplier__name"))
+            .prefetch_related(Prefetch("items", queryset=LPOItem.with_received().order_by("pk")))
+        )
+
     def _u(self):
         return getattr(self.context.get("request"), "user", None)
 
+    @cached_property
+    def _viewer_is_mgr_or_owner(self) -> bool:
+        # resolved once per serializer; a list's child serializer is shared by every row
+        request = self.context.get("request")
+        return bool(request and role_for(request, "manager_or_owner"))
+
     @extend_schema_field(OpenApiTypes.BOOL)
     def get_can_submit(self, obj: LPO):
         u = self._u()
         if not u or not u.is_authenticated: return False
         # Allow the creator (or superuser) to submit while draft and valid totals
-        return (obj.status == obj.STATUS_DRAFT) and (obj.grand_total > 0) and (u == obj.created_by or u.is_superuser)
+        return (obj.status == obj.STATUS_DRAFT) and (obj.grand_total > 0) and (obj.created_by_id == u.pk or u.is_superuser)
 
     # @extend_schema_field(OpenApiTypes.BOOL)
     # def get_can_approve(self, obj: LPO):
@@ -178,14 +242,14 @@ class LPOSerializer(serializers.ModelSerializer):
         u = self._u()
         if not u or not u.is_authenticated:
             return False
-        return (obj.status == obj.STATUS_SUBMITTED) and (u.is_superuser or is_manager_or_owner(u))
+        return (obj.status == obj.STATUS_SUBMITTED) and (u.is_superuser or self._viewer_is_mgr_or_owner)
 
     @extend_schema_field(OpenApiTypes.BOOL)
     def get_can_cancel(self, obj: LPO):
         u = self._u()
         if not u or not u.is_authenticated:
             return False
-        if obj.status in {obj.STATUS_CANCELLED, obj.STATUS_FULFILLED}:
+        if obj.status in _CLOSED_STATUSES:
             return False
         # Super admin always allowed to cancel
         if getattr(u, "is_superuser", False):
@@ -194,17 +258,24 @@ class LPOSerializer(serializers.ModelSerializer):
         if u.has_perm("procurement.approve_lpo"):
             return False
         # Everyone else cannot cancel
-        return (obj.status == obj.STATUS_DRAFT) and (u == obj.created_by)
+        return (obj.status == obj.STATUS_DRAFT) and (obj.created_by_id == u.pk)
 
     @extend_schema_field(OpenApiTypes.BOOL)
     def get_can_receive(self, obj: LPO):
         u = self._u()
         if not u or not u.is_authenticated:
             return False
-        return obj.status in {getattr(obj, "STATUS_APPROVED", "approved"),
-                              getattr(obj, "STATUS_PARTIAL", "partially_received")}
+        return obj.status in _RECEIVE_STATUSES
 
     # --- validations ---
+    @extend_schema_field(OpenApiTypes.STR)
+    def get_supplier_name_display(self, obj):
+        # create/update assign the supplier object, which may differ from the annotation
+        # setup_eager_loading added before the update; otherwise use the annotation
+        if hasattr(obj, "supplier_display_name") and not LPO.supplier.is_cached(obj):
+            return obj.supplier_display_name
+        return obj.supplier.name if obj.supplier_id else None
+
     @extend_schema_field(OpenApiTypes.STR)
     def get_submitted_by_name(self, obj):
         u = getattr(obj, "submitted_by", None)
@@ -225,9 +296,10 @@ class LPOSerializer(serializers.ModelSerializer):
         if not items:
             raise serializers.ValidationError("At least one item is required.")
         for it in items:
-            if Decimal(it.get("qty") or "0") <= 0:
+            # DecimalField has already parsed these
+            if (it.get("qty") or 0) <= 0:
                 raise serializers.ValidationError("Item qty must be > 0.")
-            if Decimal(it.get("unit_price") or "0") < 0:
+            if (it.get("unit_price") or 0) < 0:
                 raise serializers.ValidationError("Item unit_price cannot be negative.")
         return items
     
@@ -245,7 +317,7 @@ class LPOSerializer(serializers.ModelSerializer):
             # DRF typically gives an instance here, but normalize if an int slips through
             if isinstance(supplied, int):
                 try:
-                    supplied = Supplier.objects.get(pk=supplied)
+                    supplied = Supplier.objects.only("id", "name").get(pk=supplied)
                 except Supplier.DoesNotExist:
                     raise serializers.ValidationError({"supplier": "Supplier id does not exist."})
             data["supplier"] = supplied
@@ -256,7 +328,12 @@ class LPOSerializer(serializers.ModelSerializer):
         if not name:
             raise serializers.ValidationError({"supplier": "Supplier is required (id or supplier_name)."})
         
-        obj = Supplier.objects.filter(name__iexact=name).first()
+        # lower(name) = ... can use supplier_name_lower_idx (name__iexact compiles to UPPER()/LIKE);
+        # only what the LPO needs: the FK and the name it displays
+        obj = (
+            Supplier.objects.alias(name_lc=Lower("name")).filter(name_lc=name.lower())
+            .only("id", "name").first()
+        )
         if not obj:
             from .services import next_supplier_code
             obj = Supplier(name=name, supplier_code=next_supplier_code(), is_active=True)
@@ -265,13 +342,33 @@ class LPOSerializer(serializers.ModelSerializer):
         data["supplier"] = obj
 
     # --- persistence ---
+    def to_internal_value(self, data):
+        items = data.get("items") if hasattr(data, "get") else None
+        ids = set()
+        for it in items if isinstance(items, list) else ():
+            try:
+                ids.add(uuid.UUID(str(it["inventory_item"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+        if ids:
+            self._inventory_items = InventoryEntry.objects.only(*_INVENTORY_LOOKUP_FIELDS).order_by().in_bulk(ids)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def _lines_subtotal(items) -> Decimal:
+        # each line rounded to cents, as line_total is stored
+        return sum(
+            ((i["qty"] * i["unit_price"]).quantize(CENT) for i in items),
+            Decimal("0.00"),
+        )
+
     def validate(self, attrs):
         items = attrs.get("items") or []
-        subtotal = sum(Decimal(i["qty"]) * Decimal(i["unit_price"]) for i in items)
+        subtotal = self._lines_subtotal(items)
         tax_enabled = attrs.get("tax_enabled", True)
         rate = attrs.get("tax_rate")
         if tax_enabled and rate is not None:
-            attrs["tax_amount"] = (subtotal * (Decimal(rate) / Decimal("100"))).quantize(Decimal("0.01"))
+            attrs["tax_amount"] = (subtotal * rate / 100).quantize(CENT)
         return attrs
 
     def _strip_non_model_flags(self, data: dict) -> None:
@@ -290,12 +387,10 @@ class LPOSerializer(serializers.ModelSerializer):
             from .services import next_lpo_number
             validated["lpo_number"] = next_lpo_number()
 
-        lpo = LPO.objects.create(**validated)
-        for i in items_data:
-            LPOItem.objects.create(lpo=lpo, **i)
-
-        lpo.recompute_totals()
-        lpo.save(update_fields=["subtotal", "grand_total"])
+        lpo = LPO(**validated)
+        lpo.recompute_totals(self._lines_subtotal(items_data))
+        lpo.save()
+        LPOItem.bulk_create_for(lpo, items_data)
         return lpo
 
     def update(self, instance, validated):
@@ -310,15 +405,13 @@ class LPOSerializer(serializers.ModelSerializer):
 
         for k, v in validated.items():
             setattr(instance, k, v)
+        instance.recompute_totals(
+            self._lines_subtotal(items_data) if items_data is not None else instance.subtotal
+        )
         instance.save()
 
         if items_data is not None:
-            instance.items.all().delete()
-            for i in items_data:
-                LPOItem.objects.create(lpo=instance, **i)
-
-        instance.recompute_totals()
-        instance.save(update_fields=["subtotal", "grand_total"])
+            LPOItem.sync_for(instance, items_data)
         return instance
 
 # =========================
@@ -335,11 +428,12 @@ class LPOAttachmentSerializer(serializers.ModelSerializer):
 # GRN (Goods Receipt)
 # =========================
 class GRNItemIn(serializers.Serializer):
-    lpo_item = serializers.PrimaryKeyRelatedField(queryset=LPOItem.objects.all())
+    # existence check only; create() re-reads the rows it needs under lock
+    lpo_item = serializers.PrimaryKeyRelatedField(queryset=LPOItem.objects.only("id"))
     qty_received = serializers.DecimalField(max_digits=14, decimal_places=2)
 
     def validate_qty_received(self, v):
-        if Decimal(v) <= 0:
+        if v <= 0:
             raise serializers.ValidationError("qty_received must be > 0.")
         return v
 
@@ -354,11 +448,7 @@ class GoodsReceiptSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         lpo: LPO = attrs["lpo"]
-        allowed = {
-            getattr(LPO, "STATUS_APPROVED", "approved"),
-            getattr(LPO, "STATUS_PARTIAL", "partially_received"),
-        }
-        if lpo.status not in allowed:
+        if lpo.status not in _RECEIVE_STATUSES:
             raise serializers.ValidationError("Only approved or partially received LPO can receive goods.")
         return attrs
 
@@ -375,26 +465,43 @@ class GoodsReceiptSerializer(serializers.ModelSerializer):
 
         from decimal import Decimal as D
         from django.db import transaction
-        from django.db.models import F
+        from django.db.models import Case, F, Sum, When
 
         with transaction.atomic():
             grn = GoodsReceipt.objects.create(**validated)
 
+            # Lock every referenced LPO item in one statement (pk order keeps concurrent
+            # receipts from deadlocking).
+            ids = {it["lpo_item"].pk for it in items}
+            locked = {
+                li.pk: li
+                for li in LPOItem.objects.select_for_update().filter(pk__in=ids).order_by("pk")
+            }
+            received = dict(
+                GoodsReceiptItem.objects.filter(lpo_item_id__in=ids)
+                .values("lpo_item").annotate(s=Sum("qty_received")).values_list("lpo_item", "s")
+            )
+
+            grn_items, stock = [], defaultdict(D)
             for it in items:
-                # Lock the LPO item while computing remaining
-                lpo_item = LPOItem.objects.select_for_update().get(pk=it["lpo_item"].pk)
-                remaining = lpo_item.qty - lpo_item.total_received
-                qty_received = D(it["qty_received"])
+                lpo_item = locked[it["lpo_item"].pk]
+                remaining = lpo_item.qty - received.get(lpo_item.pk, D("0"))
+                qty_received = it["qty_received"]
                 if qty_received > remaining:
                     raise serializers.ValidationError(f"Qty exceeds remaining ({remaining}).")
 
-                GoodsReceiptItem.objects.create(grn=grn, **it)
-
-                inv = lpo_item.inventory_item
-                if hasattr(inv, "increase_stock"):
-                    inv.increase_stock(qty_received)
-                elif hasattr(inv, "quantity"):
-                    type(inv).objects.filter(pk=inv.pk).update(quantity=F("quantity") + qty_received)
+                grn_items.append(GoodsReceiptItem(grn=grn, lpo_item=lpo_item, qty_received=it["qty_received"]))
+                received[lpo_item.pk] = received.get(lpo_item.pk, D("0")) + qty_received
+                if lpo_item.inventory_item_id:
+                    stock[lpo_item.inventory_item_id] += qty_received
+
+            bulk_insert(GoodsReceiptItem, grn_items)
+            if stock:
+                # one UPDATE for all touched stock rows, each bumped by its own total
+                InventoryEntry.objects.filter(pk__in=stock).update(quantity=Case(
+                    *(When(pk=pk, then=F("quantity") + qty) for pk, qty in stock.items()),
+                    output_field=InventoryEntry._meta.get_field("quantity"),
+                ))
 
             lpo = grn.lpo
             lpo.refresh_receive_status()
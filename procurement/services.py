@@ -1,14 +1,24 @@
 # procurement/services.py
 from __future__ import annotations
 
+import hashlib
+import html
+import io
 import logging
-import mimetypes
-from base64 import b64encode
+import threading
+from binascii import b2a_base64
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
+from string import Template
+from types import SimpleNamespace
 from typing import Tuple
 
 from django.conf import settings
-from django.db import transaction
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import connections, router, transaction
+from django.dispatch import receiver
 from django.utils import timezone
 
 from .models import LPO, LPOSequence
@@ -18,17 +28,60 @@ log = logging.getLogger(__name__)
 # -------------------------
 # Numbering helpers
 # -------------------------
+def _reserve_block(year: int, size: int) -> int:
+    """
+    Advance the year's counter by `size` in one statement and return its new value,
+    i.e. the last number of the reserved block. Creates the year's row on first use.
+    """
+    connection = connections[router.db_for_write(LPOSequence)]
+    qn = connection.ops.quote_name
+    sql = "UPDATE %s SET %s = %s + %%s WHERE %s = %%s RETURNING %s" % (
+        qn(LPOSequence._meta.db_table), qn("counter"), qn("counter"), qn("year"), qn("counter"),
+    )
+    with connection.cursor() as cur:
+        cur.execute(sql, [size, year])
+        row = cur.fetchone()
+    if row is None:
+        LPOSequence.objects.get_or_create(year=year)
+        return _reserve_block(year, size)
+    return row[0]
+
+
+# Numbers reserved from the sequence row but not handed out yet, per year (hi-lo).
+_spare: dict[int, deque[int]] = {}
+_spare_lock = threading.Lock()
+
+
+def _keep_spare(year: int, numbers: deque[int]) -> None:
+    with _spare_lock:
+        for y in [y for y in _spare if y != year]:
+            del _spare[y]
+        _spare.setdefault(year, deque()).extend(numbers)
+
+
 def _next_year_counter() -> Tuple[int, int]:
     """
-    Returns (year, counter_after_increment) using a single global LPOSequence row per year.
-    Safe under concurrency via select_for_update.
+    Returns (year, counter) from the single global LPOSequence row per year.
+
+    The row is advanced SACSOL_SEQUENCE_BLOCK_SIZE at a time with one UPDATE ...
+    RETURNING. Numbers beyond the first are kept in-process for later calls, but only
+    once the reserving transaction commits: a rolled-back reservation hands nothing
+    out twice. Block sizes above 1 trade gapless, strictly ordered numbering across
+    workers for fewer trips to (and shorter locks on) the sequence row.
     """
     year = timezone.now().year
-    with transaction.atomic():
-        seq, _ = LPOSequence.objects.select_for_update().get_or_create(year=year)
-        seq.counter += 1
-        seq.save(update_fields=["counter"])
-        return year, seq.counter
+    with _spare_lock:
+        spare = _spare.get(year)
+        if spare:
+            return year, spare.popleft()
+
+    size = max(1, int(getattr(settings, "SACSOL_SEQUENCE_BLOCK_SIZE", 1)))
+    last = _reserve_block(year, size)
+    first = last - size + 1
+    if size > 1:
+        rest = deque(range(first + 1, last + 1))
+        transaction.on_commit(lambda: _keep_spare(year, rest))
+    return year, first
 
 
 def next_lpo_number() -> str:
@@ -54,14 +107,54 @@ def next_supplier_code() -> str:
 # -------------------------
 # Public helpers
 # -------------------------
+@lru_cache(maxsize=1)
+def _verify_base() -> str:
+    base = getattr(settings, "SITE_URL", None) or getattr(settings, "FRONTEND_BASE_URL", "") or ""
+    return base.rstrip("/")
+
+
+@receiver(setting_changed)
+def _reset_verify_base(*, setting, **kwargs):
+    if setting in ("SITE_URL", "FRONTEND_BASE_URL"):
+        _verify_base.cache_clear()
+
+
 def public_verify_url(lpo: LPO) -> str:
     """
     Builds a public verify URL for the LPO. We try to use a base URL from settings.
     Fallback is a relative path that your frontend can handle.
     """
-    base = getattr(settings, "SITE_URL", None) or getattr(settings, "FRONTEND_BASE_URL", "") or ""
-    path = f"/verify/lpo/{lpo.lpo_number}"
-    return f"{base.rstrip('/')}{path}" if base else path
+    return f"{_verify_base()}/verify/lpo/{lpo.lpo_number}"
+
+
+# -------------------------
+# Rendered PDF cache
+# -------------------------
+PDF_CACHE_MAX_BYTES = 1024 * 1024  # memcached's default item size limit
+PDF_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def pdf_cache_key(lpo: LPO) -> str:
+    # full saves (items are only written through the LPO) bump updated_at; status changes
+    # save with update_fields or queryset.update(), which don't, so key on what they write too.
+    # The supplier block, the letterhead and logo (statted per call: it may be replaced in
+    # place), the approver's name and the line descriptions (which fall back to the
+    # inventory entry's) are printed as well: key on those too.
+    C = _company_meta()
+    printed = (_approver_name(lpo.approved_by), [_line_description(it) for it in _lpo_items(lpo)])
+    return (
+        f"lpo_pdf:{lpo.pk}:{lpo.updated_at.timestamp():.6f}:{lpo.status}:{lpo.approved_by_id}"
+        f":{lpo.supplier.updated_at.timestamp():.6f}:{C.version}:{_mtime(C.logo_path)}"
+        f":{hashlib.sha256(repr(printed).encode()).hexdigest()[:12]}"
+    )
+
+
+def cache_rendered_pdf(lpo: LPO, fp) -> None:
+    """Keep a freshly rendered PDF (`fp` positioned at its end) for the pdf endpoint, if small enough."""
+    size = fp.tell()
+    if size <= PDF_CACHE_MAX_BYTES:
+        fp.seek(0)
+        cache.set(pdf_cache_key(lpo), fp.read(size), PDF_CACHE_TIMEOUT)
 
 
 def scan_bytes_for_malware(data: bytes) -> bool:
@@ -72,243 +165,148 @@ def scan_bytes_for_malware(data: bytes) -> bool:
 # -------------------------
 # PDF rendering
 # -------------------------
-def _logo_src() -> str | None:
+_company: SimpleNamespace | None = None
+
+
+def _company_meta() -> SimpleNamespace:
+    """Company details for the PDF letterhead, read from settings once (reset by setting_changed)."""
+    global _company
+    if _company is None:
+        logo_path = getattr(settings, "COMPANY_LOGO_PATH", None)
+        if not logo_path:
+            log.warning("PDF: COMPANY_LOGO_PATH not set in settings.")
+        _company = SimpleNamespace(
+            name=getattr(settings, "COMPANY_NAME", "SACSOL ENGINEERING LIMITED"),
+            addr=getattr(settings, "COMPANY_ADDRESS", []),
+            phone=getattr(settings, "COMPANY_PHONE", ""),
+            email=getattr(settings, "COMPANY_EMAIL", ""),
+            rc=getattr(settings, "COMPANY_RC_NUMBER", ""),
+            tin=getattr(settings, "COMPANY_TAX_ID", ""),
+            logo_path=logo_path,
+            base_url=Path(getattr(settings, "BASE_DIR", Path.cwd())).as_uri(),
+        )
+        # letterhead fingerprint for the PDF cache key
+        _company.version = hashlib.sha256(repr(sorted(vars(_company).items())).encode()).hexdigest()[:12]
+    return _company
+
+
+def _mtime(path) -> float | None:
+    try:
+        return Path(path).stat().st_mtime if path else None
+    except OSError:
+        return None
+
+
+@receiver(setting_changed)
+def _reset_company_meta(*, setting, **kwargs):
+    global _company
+    if setting.startswith("COMPANY_") or setting == "BASE_DIR":
+        _company = None
+
+
+def _logo_src(raw) -> str | None:
     """
     Return a data: URI for the company logo so WeasyPrint can always render it.
     If something goes wrong, log a warning and return None (logo omitted).
     """
-    raw = getattr(settings, "COMPANY_LOGO_PATH", None)
-    if not raw:
-        log.warning("PDF: COMPANY_LOGO_PATH not set in settings.")
-        return None
-
     p = Path(raw)
-    if not p.is_file():
+    mtime = _mtime(p)
+    if mtime is None or not p.is_file():
         log.warning("PDF: logo not found at %s", p.resolve())
         return None
 
     try:
-        mime = mimetypes.guess_type(p.name)[0] or "image/png"
-        data = p.read_bytes()
-        return f"data:{mime};base64,{b64encode(data).decode('ascii')}"
+        return _logo_data_uri(str(p), mtime)
     except Exception as e:
         log.error("PDF: failed reading logo at %s: %s", p, e)
         return None
 
 
-def render_lpo_pdf_bytes(lpo: LPO) -> bytes:
-    """
-    Styled, print-ready LPO PDF (white background, professional layout).
-    Uses WeasyPrint if available; otherwise returns a tiny valid PDF stub.
-    """
-    # Pull company meta safely
-    C = {
-        "name": getattr(settings, "COMPANY_NAME", "SACSOL ENGINEERING LIMITED"),
-        "addr": getattr(settings, "COMPANY_ADDRESS", []),
-        "phone": getattr(settings, "COMPANY_PHONE", ""),
-        "email": getattr(settings, "COMPANY_EMAIL", ""),
-        "rc": getattr(settings, "COMPANY_RC_NUMBER", ""),
-        "tin": getattr(settings, "COMPANY_TAX_ID", ""),
-        "logo": _logo_src(),
+# the formats a letterhead logo can be in; avoids loading the system mime.types database
+_LOGO_MIME = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".svg": "image/svg+xml",
+    ".webp": "image/webp",
+}
+
+
+@lru_cache(maxsize=4)
+def _logo_data_uri(path: str, mtime: float) -> str:
+    # keyed on mtime so replacing the logo file is picked up without a restart
+    mime = _LOGO_MIME.get(Path(path).suffix.lower(), "image/png")
+    data = Path(path).read_bytes()
+    # b2a_base64 encodes in one C call; b64encode wraps it with extra argument handling
+    return f"data:{mime};base64,{b2a_base64(data, newline=False).decode('ascii')}"
+
+
+# Print CSS for the LPO PDF: keep it to what the document uses. Explicit white,
+# neutral borders; no CSS variables. Parsed once per thread (see _weasy()).
+_LPO_CSS = """
+    @page { size: A4; margin: 22mm 16mm 18mm 16mm; }
+    html, body {
+      background: #ffffff;
+      color: #111827;
+      font: 11pt -apple-system, BlinkMacSystemFont, Segoe UI, Roboto, Inter, Helvetica, Arial, sans-serif;
     }
-    verify = public_verify_url(lpo)
-
-    # Convenience formatters
-    currency = getattr(lpo, "currency", "") or ""
-    def fmt_money(x):
-        try:
-            return f"{currency} {float(x):,.2f}".strip()
-        except Exception:
-            return f"{currency} {x}".strip()
-
-    def fmt_date(d):
-        try:
-            return d.strftime("%d %b %Y")
-        except Exception:
-            return str(d or "-")
-
-    # Supplier bits (guard against None)
-    sup = lpo.supplier
-    sup_name = getattr(sup, "name", "") or "—"
-    sup_addr = getattr(sup, "address", "") or ""
-    sup_phone = getattr(sup, "phone", "") or ""
-    sup_email = getattr(sup, "email", "") or ""
-
-    # Build items rows once (description fallback)
-    rows_html = "\n".join(
-        f"""
-        <tr>
-          <td class="c">{i+1}</td>
-          <td>{(it.description or getattr(it.inventory_item, "description", "") or str(it.inventory_item) or "").strip()}</td>
-          <td class="r">{it.qty}</td>
-          <td class="r">{fmt_money(it.unit_price)}</td>
-          <td class="r">{fmt_money(it.line_total)}</td>
-        </tr>
-        """.strip()
-        for i, it in enumerate(lpo.items.all())
-    )
-
-    # Inline CSS: explicit white, neutral borders; no CSS variables
-    html = f"""
-<!DOCTYPE html>
+    .header { display: grid; grid-template-columns: 300px 1fr; gap: 14px; align-items: center; margin-bottom: 8px; }
+    .brand h1 { margin: 0 0 2px 0; font-size: 14pt; letter-spacing: .5px; }
+    .brand small { color: #6B7280; font-size: 9pt; }
+    .logo img { max-height: 60px; }
+    .title {
+      margin-top: 10px; padding: 10px 12px; background: #F3F4F6;
+      border: 1px solid #E5E7EB; border-radius: 8px;
+      font-weight: 600; text-transform: uppercase; letter-spacing: .6px;
+    }
+    .meta-grid { display: grid; grid-template-columns: 1.1fr 1fr; gap: 12px; margin: 14px 0 10px; }
+    .box, .totalbox, .terms { border: 1px solid #E5E7EB; border-radius: 8px; padding: 10px 12px; }
+    .box { min-width: 0; }
+    .box h3 {
+      margin: 0 0 6px 0; font-size: 10pt; color: #6B7280;
+      font-weight: 600; text-transform: uppercase; letter-spacing: .5px;
+    }
+    .kv { display: grid; grid-template-columns: 140px 1fr; gap: 6px 12px; font-size: 10.5pt; }
+    .kv .label, .totalbox .label { color: #6B7280; }
+    /* fixed layout: column widths come from the <colgroup>, not from measuring every cell */
+    table.items { width: 100%; table-layout: fixed; border-collapse: collapse; margin-top: 8px; font-size: 10.5pt; }
+    table.items col.c { width: 28px; }
+    table.items col.qty { width: 64px; }
+    table.items col.money { width: 116px; }
+    table.items th, table.items td { border: 1px solid #E5E7EB; }
+    table.items th { background: #F9FAFB; padding: 7px 8px; text-align: left; font-weight: 600; color: #374151; }
+    table.items td { padding: 6px 8px; vertical-align: top; overflow-wrap: break-word; }
+    table.items td.c { text-align: center; }
+    table.items td.r { text-align: right; white-space: nowrap; }
+    .totals { margin-top: 8px; display: grid; grid-template-columns: 1fr 240px; gap: 12px; align-items: start; }
+    .totalbox .row { display: grid; grid-template-columns: 1fr 1fr; gap: 6px 12px; font-size: 10.5pt; margin: 2px 0; }
+    .totalbox .grand { font-weight: 700; font-size: 11.5pt; margin-top: 6px; }
+    .terms { margin-top: 12px; font-size: 10pt; }
+    .signs { margin-top: 18px; display: grid; grid-template-columns: 1fr 1fr; gap: 18px; }
+    .sign { border-top: 1px solid #9CA3AF; padding-top: 6px; font-size: 10pt; }
+    footer { position: fixed; left: 0; right: 0; bottom: 10mm; text-align: center; color: #9CA3AF; font-size: 9pt; }
+    footer .page::after { content: "Page " counter(page) " of " counter(pages); }
+"""
+
+# Built once at import; render_lpo_pdf_bytes only substitutes the per-LPO values.
+_LPO_TEMPLATE = Template("""<!DOCTYPE html>
 <html>
 <head>
   <meta charset="utf-8" />
-  <style>
-    @page {{
-      size: A4;
-      margin: 22mm 16mm 18mm 16mm;
-    }}
-    html, body {{
-      background: #ffffff !important;
-      color: #111827;
-      font: 11pt -apple-system, BlinkMacSystemFont, Segoe UI, Roboto, Inter, Helvetica, Arial, sans-serif;
-      -webkit-print-color-adjust: exact;
-      print-color-adjust: exact;
-    }}
-    .wrap {{ width: 100%; }}
-    .header {{
-      display: grid;
-      grid-template-columns: 300px 1fr;
-      gap: 14px;
-      align-items: center;
-      margin-bottom: 8px;
-    }}
-    .brand h1 {{
-      margin: 0 0 2px 0;
-      font-size: 14pt;
-      letter-spacing: .5px;
-    }}
-    .brand small {{
-      color: #6B7280;
-      font-size: 9pt;
-    }}
-    .logo img {{
-      max-height: 60px;
-    }}
-    .title {{
-      margin-top: 10px;
-      padding: 10px 12px;
-      background: #F3F4F6;
-      border: 1px solid #E5E7EB;
-      border-radius: 8px;
-      font-weight: 600;
-      text-transform: uppercase;
-      letter-spacing: .6px;
-    }}
-    .meta-grid {{
-      display: grid;
-      grid-template-columns: 1.1fr 1fr;
-      gap: 12px;
-      margin: 14px 0 10px;
-    }}
-    .box {{
-      border: 1px solid #E5E7EB;
-      border-radius: 8px;
-      padding: 10px 12px;
-      min-width: 0;
-    }}
-    .box h3 {{
-      margin: 0 0 6px 0;
-      font-size: 10pt;
-      color: #6B7280;
-      font-weight: 600;
-      text-transform: uppercase;
-      letter-spacing: .5px;
-    }}
-    .kv {{
-      display: grid;
-      grid-template-columns: 140px 1fr;
-      gap: 6px 12px;
-      font-size: 10.5pt;
-    }}
-    .kv div.label {{ color: #6B7280; }}
-    table.items {{
-      width: 100%;
-      border-collapse: collapse;
-      margin-top: 8px;
-      font-size: 10.5pt;
-      min-width: 0;
-    }}
-    table.items th {{
-      background: #F9FAFB;
-      border: 1px solid #E5E7EB;
-      padding: 7px 8px;
-      text-align: left;
-      font-weight: 600;
-      color: #374151;
-    }}
-    table.items td {{
-      border: 1px solid #E5E7EB;
-      padding: 6px 8px;
-      vertical-align: top;
-    }}
-    table.items td.c {{ text-align: center; width: 28px; }}
-    table.items td.r {{ text-align: right; white-space: nowrap; }}
-    .totals {{
-      margin-top: 8px;
-      display: grid;
-      grid-template-columns: 1fr 240px;
-      gap: 12px;
-      align-items: start;
-    }}
-    .totalbox {{
-      border: 1px solid #E5E7EB;
-      border-radius: 8px;
-      padding: 10px 12px;
-    }}
-    .totalbox .row {{
-      display: grid;
-      grid-template-columns: 1fr 1fr;
-      gap: 6px 12px;
-      font-size: 10.5pt;
-      margin: 2px 0;
-    }}
-    .totalbox .row .label {{ color: #6B7280; }}
-    .totalbox .grand {{ font-weight: 700; font-size: 11.5pt; margin-top: 6px; }}
-    .terms {{
-      margin-top: 12px;
-      border: 1px solid #E5E7EB;
-      border-radius: 8px;
-      padding: 10px 12px;
-      font-size: 10pt;
-    }}
-    .signs {{
-      margin-top: 18px;
-      display: grid;
-      grid-template-columns: 1fr 1fr;
-      gap: 18px;
-    }}
-    .sign {{
-      border-top: 1px solid #9CA3AF;
-      padding-top: 6px;
-      font-size: 10pt;
-      text-align: left;
-    }}
-    footer {{
-      position: fixed;
-      left: 0; right: 0; bottom: 10mm;
-      text-align: center;
-      color: #9CA3AF;
-      font-size: 9pt;
-    }}
-    footer .page::after {{
-      content: "Page " counter(page) " of " counter(pages);
-    }}
-  </style>
 </head>
 <body>
   <div class="wrap">
     <div class="header">
       <div class="logo">
-        {"<img src='" + (C["logo"] or "") + "' alt='Logo' />" if C["logo"] else ""}
+        $logo
       </div>
       <div class="brand">
-        <h1>{C["name"]}</h1>
+        <h1>$company_name</h1>
         <small>
-          {" &middot; ".join([*C["addr"], C["phone"], C["email"]])}
-          {" &middot; RC: " + C["rc"] if C["rc"] else ""}
-          {" &middot; TIN: " + C["tin"] if C["tin"] else ""}
+          $company_contact
+          $company_rc
+          $company_tin
         </small>
       </div>
     </div>
@@ -318,29 +316,30 @@ def render_lpo_pdf_bytes(lpo: LPO) -> bytes:
     <div class="meta-grid">
       <div class="box">
         <h3>Supplier</h3>
-        <div style="font-weight:600; margin-bottom:4px;">{sup_name}</div>
-        <div style="white-space:pre-line">{sup_addr}</div>
+        <div style="font-weight:600; margin-bottom:4px;">$sup_name</div>
+        <div style="white-space:pre-line">$sup_addr</div>
         <div style="margin-top:4px; color:#6B7280;">
-          {sup_phone or ""}{(" &middot; " + sup_email) if (sup_phone and sup_email) else (sup_email or "")}
+          $sup_contact
         </div>
       </div>
 
       <div class="box">
         <h3>Order Details</h3>
         <div class="kv">
-          <div class="label">LPO No.</div><div>{lpo.lpo_number}</div>
-          <div class="label">Status</div><div style="text-transform:capitalize">{lpo.status}</div>
-          <div class="label">Created</div><div>{fmt_date(getattr(lpo, "created_at", None))}</div>
-          <div class="label">Expected Delivery</div><div>{fmt_date(lpo.expected_delivery_date)}</div>
-          <div class="label">Currency</div><div>{currency or "-"}</div>
-          <div class="label">Payment Terms</div><div>{lpo.payment_terms or "-"}</div>
-          <div class="label">Deliver To</div><div>{lpo.delivery_address or "-"}</div>
-          <div class="label">Verify</div><div>{verify}</div>
+          <div class="label">LPO No.</div><div>$lpo_number</div>
+          <div class="label">Status</div><div style="text-transform:capitalize">$status</div>
+          <div class="label">Created</div><div>$created</div>
+          <div class="label">Expected Delivery</div><div>$expected</div>
+          <div class="label">Currency</div><div>$currency</div>
+          <div class="label">Payment Terms</div><div>$payment_terms</div>
+          <div class="label">Deliver To</div><div>$delivery_address</div>
+          <div class="label">Verify</div><div>$verify</div>
         </div>
       </div>
     </div>
 
     <table class="items">
+      <colgroup><col class="c" /><col /><col class="qty" /><col class="money" /><col class="money" /></colgroup>
       <thead>
         <tr>
           <th class="c">#</th>
@@ -351,17 +350,17 @@ def render_lpo_pdf_bytes(lpo: LPO) -> bytes:
         </tr>
       </thead>
       <tbody>
-        {rows_html or "<tr><td class='c'>–</td><td>No items</td><td class='r'>–</td><td class='r'>–</td><td class='r'>–</td></tr>"}
+        $rows
       </tbody>
     </table>
 
     <div class="totals">
       <div></div>
       <div class="totalbox">
-        <div class="row"><div class="label">Subtotal</div><div style="text-align:right">{fmt_money(lpo.subtotal)}</div></div>
-        <div class="row"><div class="label">Tax</div><div style="text-align:right">{fmt_money(lpo.tax_amount)}</div></div>
-        <div class="row"><div class="label">Discount</div><div style="text-align:right">{fmt_money(lpo.discount_amount)}</div></div>
-        <div class="row grand"><div>Total</div><div style="text-align:right">{fmt_money(lpo.grand_total)}</div></div>
+        <div class="row"><div class="label">Subtotal</div><div style="text-align:right">$subtotal</div></div>
+        <div class="row"><div class="label">Tax</div><div style="text-align:right">$tax</div></div>
+        <div class="row"><div class="label">Discount</div><div style="text-align:right">$discount</div></div>
+        <div class="row grand"><div>Total</div><div style="text-align:right">$grand_total</div></div>
       </div>
     </div>
 
@@ -379,31 +378,170 @@ def render_lpo_pdf_bytes(lpo: LPO) -> bytes:
     <div class="signs">
       <div>
         <div style="height:38px"></div>
-        <div class="sign">Authorized by: {getattr(getattr(lpo, "approved_by", None), "get_full_name", lambda: "")() or getattr(getattr(lpo, "approved_by", None), "username", "") or "____________________"}</div>
-        <div style="font-size:9pt; color:#6B7280">For {C["name"]}</div>
+        <div class="sign">Authorized by: $approver</div>
+        <div style="font-size:9pt; color:#6B7280">For $company_name</div>
       </div>
       <div>
         <div style="height:38px"></div>
         <div class="sign">Supplier’s Acknowledgement / Signature</div>
-        <div style="font-size:9pt; color:#6B7280">{sup_name}</div>
+        <div style="font-size:9pt; color:#6B7280">$sup_name</div>
       </div>
     </div>
   </div>
 
   <footer>
     <div class="page"></div>
-    <div style="margin-top:4px;">This document was generated on {timezone.now().strftime("%d %b %Y, %H:%M")} — {verify}</div>
+    <div style="margin-top:4px;">This document was generated on $generated_at — $verify</div>
   </footer>
 </body>
-</html>
-    """.strip()
+</html>""")
+
+_ROW_TEMPLATE = (
+    '<tr><td class="c">{n}</td><td>{desc}</td><td class="r">{qty}</td>'
+    '<td class="r">{price}</td><td class="r">{total}</td></tr>'
+)
+_NO_ITEMS_ROW = "<tr><td class='c'>–</td><td>No items</td><td class='r'>–</td><td class='r'>–</td><td class='r'>–</td></tr>"
+
+
+def _line_description(item) -> str:
+    inv = item.inventory_item
+    return (item.description or getattr(inv, "description", "") or str(inv) or "").strip()
+
+
+def _lpo_items(lpo: LPO) -> list:
+    # reuse items the caller prefetched; otherwise fetch them with their inventory entries
+    if "items" in getattr(lpo, "_prefetched_objects_cache", {}):
+        return list(lpo.items.all())
+    return list(lpo.items.select_related("inventory_item"))
+
+
+def _approver_name(approver) -> str:
+    return getattr(approver, "get_full_name", lambda: "")() or getattr(approver, "username", "")
+
+
+_weasy_local = threading.local()
+
+
+def _weasy():
+    """
+    WeasyPrint's HTML class plus the parsed LPO stylesheet and font configuration.
+
+    Parsing the CSS and setting up fonts is a fixed cost per render; doing it once
+    per thread lets every later PDF (and each PDF of a bulk approval) skip it.
+    Per thread because the objects aren't documented as thread-safe and PDFs are
+    also rendered on the task pool. Raises ImportError if WeasyPrint isn't installed.
+    """
+    cached = getattr(_weasy_local, "objects", None)
+    if cached is None:
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+        font_config = FontConfiguration()
+        cached = (HTML, CSS(string=_LPO_CSS, font_config=font_config), font_config)
+        _weasy_local.objects = cached
+    return cached
+
+
+def warm_pdf_renderer() -> None:
+    """
+    Pay WeasyPrint's one-off costs (import, Pango/fontconfig setup, stylesheet parse)
+    up front on the calling thread, so the first real PDF rendered there doesn't.
+    """
+    try:
+        HTML, stylesheet, font_config = _weasy()
+        HTML(string="<p>warm-up</p>").write_pdf(stylesheets=[stylesheet], font_config=font_config)
+    except Exception as e:
+        log.debug("PDF renderer warm-up skipped: %s", e)
+
+
+_PDF_STUB = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+
+def render_lpo_pdf_bytes(lpo: LPO) -> bytes:
+    """The LPO PDF as bytes (for email attachments); see render_lpo_pdf_to_file()."""
+    buf = io.BytesIO()
+    render_lpo_pdf_to_file(lpo, buf)
+    return buf.getvalue()
+
+
+def render_lpo_pdf_to_file(lpo: LPO, fp) -> bool:
+    """
+    Write the styled, print-ready LPO PDF (white background, professional layout)
+    to the binary file object `fp`. Uses WeasyPrint if available; otherwise writes
+    a tiny valid PDF stub and returns False.
+    """
+    C = _company_meta()
+    logo = _logo_src(C.logo_path) if C.logo_path else None
+    verify = public_verify_url(lpo)
+
+    # Convenience formatters
+    currency = getattr(lpo, "currency", "") or ""
+    def fmt_money(x):
+        try:
+            return f"{currency} {float(x):,.2f}".strip()
+        except Exception:
+            return f"{currency} {x}".strip()
+
+    def fmt_date(d):
+        try:
+            return d.strftime("%d %b %Y")
+        except Exception:
+            return str(d or "-")
+
+    # Supplier bits (guard against None)
+    sup = lpo.supplier
+    sup_name = getattr(sup, "name", "") or "—"
+    sup_phone = getattr(sup, "phone", "") or ""
+    sup_email = getattr(sup, "email", "") or ""
+
+    # Build items rows once (description fallback)
+    items = _lpo_items(lpo)
+    esc = html.escape
+    rows_html = "\n".join(
+        _ROW_TEMPLATE.format(
+            n=n, desc=esc(_line_description(it)), qty=it.qty,
+            price=fmt_money(it.unit_price), total=fmt_money(it.line_total),
+        )
+        for n, it in enumerate(items, 1)
+    )
+
+    markup = _LPO_TEMPLATE.substitute(
+        logo="<img src='" + logo + "' alt='Logo' />" if logo else "",
+        company_name=C.name,
+        company_contact=" &middot; ".join([*C.addr, C.phone, C.email]),
+        company_rc=" &middot; RC: " + C.rc if C.rc else "",
+        company_tin=" &middot; TIN: " + C.tin if C.tin else "",
+        sup_name=sup_name,
+        sup_addr=getattr(sup, "address", "") or "",
+        sup_contact=sup_phone + ((" &middot; " + sup_email) if (sup_phone and sup_email) else sup_email),
+        lpo_number=lpo.lpo_number,
+        status=lpo.status,
+        created=fmt_date(getattr(lpo, "created_at", None)),
+        expected=fmt_date(lpo.expected_delivery_date),
+        currency=currency or "-",
+        payment_terms=lpo.payment_terms or "-",
+        delivery_address=lpo.delivery_address or "-",
+        verify=verify,
+        rows=rows_html or _NO_ITEMS_ROW,
+        subtotal=fmt_money(lpo.subtotal),
+        tax=fmt_money(lpo.tax_amount),
+        discount=fmt_money(lpo.discount_amount),
+        grand_total=fmt_money(lpo.grand_total),
+        approver=_approver_name(lpo.approved_by) or "____________________",
+        generated_at=timezone.now().strftime("%d %b %Y, %H:%M"),
+    )
 
+    start = fp.tell()
     try:
-        from weasyprint import HTML
+        HTML, stylesheet, font_config = _weasy()
         # Use filesystem base_url (better than HTTP) — mainly irrelevant since we embed the logo.
-        base_url = Path(getattr(settings, "BASE_DIR", Path.cwd())).as_uri()
-        return HTML(string=html, base_url=base_url).write_pdf()
+        HTML(string=markup, base_url=C.base_url).write_pdf(
+            target=fp, stylesheets=[stylesheet], font_config=font_config,
+        )
+        return True
     except Exception as e:
         log.error("PDF generation failed, returning stub: %s", e)
-        # Minimal valid placeholder PDF bytes
-        return b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
\ No newline at end of file
+        # drop any partial output, then write a minimal valid placeholder PDF
+        fp.seek(start)
+        fp.truncate()
+        fp.write(_PDF_STUB)
+        return False
@@ -0,0 +1,140 @@
+# procurement/tasks.py
+from __future__ import annotations
+
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from string import Template
+from tempfile import SpooledTemporaryFile
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import LPO, LPOItem, AuditLog
+
+log = logging.getLogger(__name__)
+
+PDF_SPOOL_MAX_BYTES = 10 * 1024 * 1024
+LINKED_PDF_DIR = "lpo_pdfs"
+
+_EMAIL_SUBJECT = Template("$number Approved")
+_EMAIL_BODY = Template(
+    "Dear $name,\n\n"
+    "$intro\n"
+    "You can also view/verify it at: $verify_url\n\n"
+    "Regards,\nSacsol"
+)
+
+# There is no task queue in this deployment: slow side effects (PDF rendering, email)
+# run on a small per-process pool once the triggering transaction has committed.
+# Jobs still queued when a worker process exits are lost; email_approved_lpo is
+# idempotent, so re-triggering it is safe.
+
+
+def _init_worker() -> None:
+    # each pool thread keeps its own warm WeasyPrint state (see services._weasy)
+    from .services import warm_pdf_renderer
+    warm_pdf_renderer()
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "SACSOL_TASK_WORKERS", 2), thread_name_prefix="procurement-task", initializer=_init_worker,
+)
+
+
+def _run(fn, *args) -> None:
+    try:
+        fn(*args)
+    except Exception:
+        log.exception("procurement task %s%r failed", fn.__name__, args)
+    finally:
+        # this thread opened its own connections; don't leave them to time out
+        connections.close_all()
+
+
+def enqueue(fn, *args) -> None:
+    """Run `fn(*args)` off the request thread after commit (inline with SACSOL_TASKS_EAGER)."""
+    if getattr(settings, "SACSOL_TASKS_EAGER", False):
+        fn(*args)
+        return
+    transaction.on_commit(lambda: _executor.submit(_run, fn, *args))
+
+
+def _is_public_url(url: str) -> bool:
+    # a storage that serves files itself (S3, a CDN MEDIA_URL) returns absolute URLs;
+    # FileSystemStorage's /media/... is only served under DEBUG, so attach instead
+    return urlsplit(url).scheme in ("http", "https")
+
+
+def _prune_linked_pdfs() -> None:
+    """Delete linked PDFs older than SACSOL_LPO_PDF_LINK_DAYS; run whenever one is stored."""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "SACSOL_LPO_PDF_LINK_DAYS", 30))
+    try:
+        tokens, _ = default_storage.listdir(LINKED_PDF_DIR)
+        for token in tokens:
+            for fname in default_storage.listdir(f"{LINKED_PDF_DIR}/{token}")[1]:
+                name = f"{LINKED_PDF_DIR}/{token}/{fname}"
+                if default_storage.get_modified_time(name) < cutoff:
+                    default_storage.delete(name)
+    except (NotImplementedError, OSError) as e:
+        log.warning("could not prune %s/: %s", LINKED_PDF_DIR, e)
+
+
+def email_approved_lpo(lpo_id: int) -> None:
+    """Render the approved LPO's PDF and email it to the supplier, at most once per LPO."""
+    from .emails import send_lpo_pdf_to_supplier
+    from .services import cache_rendered_pdf, public_verify_url, render_lpo_pdf_to_file
+
+    lpo = (
+        LPO.objects.select_related("supplier", "approved_by")
+        .prefetch_related(
+            # same line order as the pdf endpoint, which serves what is cached below
+            Prefetch("items", queryset=LPOItem.objects.select_related("inventory_item").order_by("pk"))
+        )
+        .get(pk=lpo_id)
+    )
+    supplier = lpo.supplier
+    if not supplier.email:
+        return  # nobody to send to; the pdf endpoint renders on demand
+
+    # the "emailed" row doubles as the claim, so overlapping runs don't send twice
+    claim, created = AuditLog.objects.get_or_create(lpo=lpo, verb="emailed", defaults={"actor": None})
+    if not created:
+        return
+
+    try:
+        filename = f"{lpo.lpo_number}.pdf"
+        with SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES) as tmp:
+            rendered = render_lpo_pdf_to_file(lpo, tmp)
+            too_big = tmp.tell() > getattr(settings, "SACSOL_LPO_PDF_ATTACH_MAX_KB", 2048) * 1024
+            if rendered:
+                # the approver's download usually follows; serve it from here, not a re-render
+                cache_rendered_pdf(lpo, tmp)
+            tmp.seek(0)
+            # unguessable path; S3-style storages sign the URL they return
+            name = f"{LINKED_PDF_DIR}/{uuid.uuid4().hex}/{filename}"
+            url = default_storage.url(name) if too_big else ""
+            if _is_public_url(url):
+                name = default_storage.save(name, File(tmp))
+                _prune_linked_pdfs()
+                pdf = None
+                intro = f"Local Purchase Order {lpo.lpo_number} can be downloaded here: {default_storage.url(name)}"
+            else:
+                pdf = tmp.read()
+                intro = f"Please find attached Local Purchase Order {lpo.lpo_number}."
+        send_lpo_pdf_to_supplier(
+            supplier_email=supplier.email,
+            subject=_EMAIL_SUBJECT.substitute(number=lpo.lpo_number),
+            body=_EMAIL_BODY.substitute(name=supplier.name, intro=intro, verify_url=public_verify_url(lpo)),
+            pdf_bytes=pdf,
+            filename=filename,
+        )
+    except Exception:
+        claim.delete()  # let a later approval save retry
+        raise
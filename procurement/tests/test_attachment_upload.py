@@ -2,6 +2,7 @@
 import io
 from datetime import date
 from decimal import Decimal
+from functools import lru_cache
 
 import pytest
 from PIL import Image
@@ -18,20 +19,20 @@ pytestmark = pytest.mark.django_db
 
 # ---------- helpers ----------
 
-def _jpeg_file(w=300, h=200, color=(120, 160, 200), name="img.jpg"):
-    im = Image.new("RGB", (w, h), color)
+@lru_cache(maxsize=None)
+def _image_bytes(fmt, w, h, color):
+    # deterministic content, so encode each variant once per session
     buf = io.BytesIO()
-    im.save(buf, format="JPEG")
-    buf.seek(0)
-    return SimpleUploadedFile(name, buf.read(), content_type="image/jpeg")
+    Image.new("RGB", (w, h), color).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _jpeg_file(w=300, h=200, color=(120, 160, 200), name="img.jpg"):
+    return SimpleUploadedFile(name, _image_bytes("JPEG", w, h, color), content_type="image/jpeg")
 
 
 def _png_file(w=300, h=200, color=(100, 120, 140), name="img.png"):
-    im = Image.new("RGB", (w, h), color)
-    buf = io.BytesIO()
-    im.save(buf, format="PNG")
-    buf.seek(0)
-    return SimpleUploadedFile(name, buf.read(), content_type="image/png")
+    return SimpleUploadedFile(name, _image_bytes("PNG", w, h, color), content_type="image/png")
 
 
 def _pdf_file(size_kb=50, name="spec.pdf"):
@@ -46,7 +47,7 @@ def api():
 
 @pytest.fixture
 def user(api):
-    u = User.objects.create_user("u", password="p")
+    u = User.objects.create_user("u")
     api.force_authenticate(u)
     return u
 
@@ -176,3 +177,23 @@ def test_upload_unsupported_type(api, user, entry):
     r = api.post(url, {"file": bad}, format="multipart")
     assert r.status_code == 400
     assert "Unsupported file type" in r.data["detail"]
+
+
+def test_create_attachment_returns_the_row_a_racing_upload_won(user, settings, tmp_path):
+    from procurement.models import LPO, LPOAttachment, Supplier
+    from procurement.views import _create_attachment
+
+    settings.MEDIA_ROOT = str(tmp_path)
+    supplier = Supplier.objects.create(supplier_code="SUP-2025-000040", name="Race Co")
+    lpo = LPO.objects.create(lpo_number="LPO-RACE-1", supplier=supplier, created_by=user)
+
+    first, created = _create_attachment(lpo=lpo, file=_pdf_file(1), mime_type="application/pdf", checksum="abc")
+    assert created
+    # the duplicate lookup missed it (concurrent upload): the INSERT hits the constraint
+    again, created = _create_attachment(lpo=lpo, file=_pdf_file(1, name="again.pdf"), mime_type="application/pdf", checksum="abc")
+    assert not created
+    assert again.pk == first.pk
+    assert LPOAttachment.objects.filter(lpo=lpo).count() == 1
+    # the loser's stored file is removed again; only the winner's remains
+    stored = [p.name for p in tmp_path.rglob("*.pdf")]
+    assert stored == [first.file.name.rsplit("/", 1)[-1]]
@@ -21,12 +21,12 @@ def api():
 
 @pytest.fixture
 def staff(db):
-    return User.objects.create_user(username="staff", password="pass")
+    return User.objects.create_user(username="staff")
 
 
 @pytest.fixture
 def manager(db):
-    u = User.objects.create_user(username="manager", password="pass")
+    u = User.objects.create_user(username="manager")
     g, _ = Group.objects.get_or_create(name="manager")
     u.groups.add(g)
     return u
@@ -54,14 +54,14 @@ pytestmark = pytest.mark.django_db
 
 @pytest.fixture
 def creator(api):
-    u = User.objects.create_user(username="rec_creator", password="pass")
+    u = User.objects.create_user(username="rec_creator")
     api.force_authenticate(user=u)
     return u
 
 @pytest.fixture
 def manager_user():
     g, _ = Group.objects.get_or_create(name="manager")
-    m = User.objects.create_user(username="rec_manager", password="pass")
+    m = User.objects.create_user(username="rec_manager")
     m.groups.add(g)
     return m
 
@@ -211,3 +211,56 @@ def test_partial_then_fulfilled_status_and_inventory(auth_staff, approved_lpo):
 
     r_done = auth_staff.get(reverse("lpos-detail", args=[approved_lpo]))
     assert r_done.json()["status"] == "fulfilled"
+
+
+def _approve(auth_staff, auth_manager, supplier_id, lines):
+    r = auth_staff.post(reverse("lpos-list"), {
+        "supplier": supplier_id, "currency": "NGN", "tax_amount": "0.00", "discount_amount": "0.00",
+        "items": [{"inventory_item": inv.id, "description": d, "qty": q, "unit_price": "1.00"} for inv, d, q in lines],
+    }, format="json")
+    assert r.status_code == 201, r.content
+    lpo_id = r.json()["id"]
+    auth_staff.post(reverse("lpos-submit", args=[lpo_id]))
+    auth_manager.post(reverse("lpos-approve", args=[lpo_id]))
+    return lpo_id, {it.description: it.id for it in LPO.objects.get(pk=lpo_id).items.all()}
+
+
+@pytest.mark.django_db
+def test_grn_repeated_line_checks_running_total(auth_staff, auth_manager, supplier_id, make_inventory_item):
+    lpo_id, ids = _approve(auth_staff, auth_manager, supplier_id, [(make_inventory_item("Nut"), "A", "10.00")])
+    grn_url = reverse("grn-list")
+
+    # each line fits on its own, together they exceed the ordered 10
+    r = auth_staff.post(grn_url, {"lpo": lpo_id, "items": [
+        {"lpo_item": ids["A"], "qty_received": "4.00"}, {"lpo_item": ids["A"], "qty_received": "7.00"},
+    ]}, format="json")
+    assert r.status_code == 400
+    assert "Qty exceeds remaining (6.00)." in str(r.json())
+    assert not GoodsReceipt.objects.filter(lpo_id=lpo_id).exists()
+
+    r = auth_staff.post(grn_url, {"lpo": lpo_id, "items": [
+        {"lpo_item": ids["A"], "qty_received": "4.00"}, {"lpo_item": ids["A"], "qty_received": "6.00"},
+    ]}, format="json")
+    assert r.status_code == 201, r.content
+    assert LPO.objects.get(pk=lpo_id).status == LPO.STATUS_FULFILLED
+
+
+@pytest.mark.django_db
+def test_grn_bumps_each_inventory_entry_by_its_total(auth_staff, auth_manager, supplier_id, make_inventory_item):
+    bolt, nut, spare = make_inventory_item("Bolt", 1), make_inventory_item("Nut"), make_inventory_item("Spare", 7)
+    lpo_id, ids = _approve(auth_staff, auth_manager, supplier_id, [
+        (bolt, "A", "10.00"), (nut, "B", "10.00"), (bolt, "C", "10.00"),
+    ])
+
+    r = auth_staff.post(reverse("grn-list"), {"lpo": lpo_id, "items": [
+        {"lpo_item": ids["A"], "qty_received": "2.00"},
+        {"lpo_item": ids["B"], "qty_received": "3.00"},
+        {"lpo_item": ids["C"], "qty_received": "4.00"},
+    ]}, format="json")
+    assert r.status_code == 201, r.content
+
+    grn = GoodsReceipt.objects.get(lpo_id=lpo_id)
+    assert sorted(grn.items.values_list("qty_received", flat=True)) == [Decimal("2"), Decimal("3"), Decimal("4")]
+    for entry, qty in ((bolt, "7"), (nut, "3"), (spare, "7")):
+        entry.refresh_from_db()
+        assert entry.quantity == Decimal(qty)
@@ -22,12 +22,12 @@ def api():
 
 @pytest.fixture
 def user(db):
-    return User.objects.create_user(username="staff", email="staff@example.com", password="pass")
+    return User.objects.create_user(username="staff", email="staff@example.com")
 
 
 @pytest.fixture
 def manager(db):
-    mgr = User.objects.create_user(username="manager", email="mgr@example.com", password="pass")
+    mgr = User.objects.create_user(username="manager", email="mgr@example.com")
     group, _ = Group.objects.get_or_create(name="manager")
     mgr.groups.add(group)
     return mgr
@@ -56,14 +56,14 @@ pytestmark = pytest.mark.django_db
 
 @pytest.fixture
 def creator(api):
-    u = User.objects.create_user(username="creator", password="pass")
+    u = User.objects.create_user(username="creator")
     api.force_authenticate(user=u)
     return u
 
 @pytest.fixture
 def manager_user():
     g, _ = Group.objects.get_or_create(name="manager")
-    m = User.objects.create_user(username="manager", password="pass")
+    m = User.objects.create_user(username="manager")
     m.groups.add(g)
     return m
 
@@ -191,3 +191,89 @@ def test_create_submit_approve_lpo_flow(auth_staff, auth_manager, supplier_id, m
     r_pdf = auth_staff.get(reverse("lpos-pdf", args=[lpo["id"]]))
     assert r_pdf.status_code == 200
     assert r_pdf["Content-Type"].startswith("application/pdf")
+
+
+def test_pdf_cache_key_follows_supplier_and_logo(api, creator, supplier, inv_item, settings, tmp_path):
+    import os
+    from procurement.services import pdf_cache_key
+
+    logo = tmp_path / "logo.png"
+    logo.write_bytes(b"\x89PNG")
+    settings.COMPANY_LOGO_PATH = str(logo)
+    lpo = _create_lpo(api, supplier, inv_item)
+
+    key = pdf_cache_key(LPO.objects.get(pk=lpo.pk))
+    assert pdf_cache_key(LPO.objects.get(pk=lpo.pk)) == key
+
+    supplier.phone = "08030000000"
+    supplier.save()
+    after_supplier = pdf_cache_key(LPO.objects.get(pk=lpo.pk))
+    assert after_supplier != key
+
+    # logo replaced in place: same settings, newer file
+    st = logo.stat()
+    os.utime(logo, (st.st_atime, st.st_mtime + 10))
+    assert pdf_cache_key(LPO.objects.get(pk=lpo.pk)) != after_supplier
+
+
+def test_update_syncs_lines_in_place(api, creator, supplier, inv_item):
+    lpo = _create_lpo(api, supplier, inv_item)
+    other = _create_lpo(api, supplier, inv_item)
+    kept = lpo.items.get()
+    r = api.patch(reverse("lpos-detail", args=[lpo.id]), {"items": [
+        {"id": kept.id, "description": "Widget A", "qty": "10.00", "unit_price": "5.00"},
+        {"description": "Widget B", "qty": "1.00", "unit_price": "2.00"},
+    ]}, format="json")
+    assert r.status_code == 200, r.data
+    dropped = lpo.items.get(description="Widget B")
+
+    other_line = other.items.get()
+    r = api.patch(reverse("lpos-detail", args=[lpo.id]), {"items": [
+        {"id": kept.id, "description": "Widget A+", "qty": "4.00", "unit_price": "5.00"},
+        {"id": other_line.id, "description": "Borrowed", "qty": "3.00", "unit_price": "1.00"},
+    ]}, format="json")
+    assert r.status_code == 200, r.data
+
+    lines = {it.description: it for it in lpo.items.all()}
+    assert set(lines) == {"Widget A+", "Borrowed"}
+    # edited in place, keeping its id
+    assert lines["Widget A+"].id == kept.id
+    assert lines["Widget A+"].line_total == Decimal("20.00")
+    assert not lpo.items.filter(pk=dropped.pk).exists()
+    # another LPO's line id is inserted as a new line here and leaves the original alone
+    assert lines["Borrowed"].id != other_line.id
+    other_line.refresh_from_db()
+    assert (other_line.lpo_id, other_line.description) == (other.id, "Widget A")
+    lpo.refresh_from_db()
+    assert lpo.subtotal == Decimal("23.00")
+
+
+def test_approval_emails_supplier_once(api, creator, manager_user, inv_item, settings):
+    from unittest import mock
+    from django.core import mail
+    from procurement.tasks import email_approved_lpo
+
+    settings.SACSOL_TASKS_EAGER = True
+    supplier = Supplier.objects.create(supplier_code="SUP-2025-000011", name="Mail Co", email="sales@mail.co")
+    lpo = _create_lpo(api, supplier, inv_item)
+    api.post(reverse("lpos-submit", args=[lpo.id]))
+    api.force_authenticate(user=manager_user)
+    assert api.post(reverse("lpos-approve", args=[lpo.id])).status_code == 200
+
+    assert len(mail.outbox) == 1
+    msg = mail.outbox[0]
+    assert msg.to == ["sales@mail.co"]
+    assert msg.subject == f"{lpo.lpo_number} Approved"
+    assert msg.attachments[0][0] == f"{lpo.lpo_number}.pdf"
+    assert AuditLog.objects.filter(lpo=lpo, verb="emailed").count() == 1
+
+    # the "emailed" claim makes a re-run a no-op
+    email_approved_lpo(lpo.id)
+    assert len(mail.outbox) == 1
+
+    # a failed send releases the claim so a later run can retry
+    AuditLog.objects.filter(lpo=lpo, verb="emailed").delete()
+    with mock.patch("procurement.emails.send_lpo_pdf_to_supplier", side_effect=RuntimeError("smtp down")):
+        with pytest.raises(RuntimeError):
+            email_approved_lpo(lpo.id)
+    assert not AuditLog.objects.filter(lpo=lpo, verb="emailed").exists()
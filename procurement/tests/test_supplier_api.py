@@ -17,7 +17,7 @@ def api():
 
 @pytest.fixture
 def user(db):
-    return User.objects.create_user(username="staff", email="staff@example.com", password="pass")
+    return User.objects.create_user(username="staff", email="staff@example.com")
 
 
 @pytest.fixture
@@ -28,7 +28,7 @@ def auth(api, user):
 
 @pytest.fixture
 def auth_user(api, db):
-    u = User.objects.create_user(username="u1", password="pass")
+    u = User.objects.create_user(username="u1")
     api.force_authenticate(user=u)
     return u
 
@@ -124,3 +124,28 @@ def test_list_filter_q(api, auth_user):
     data = r.json()
     names = [x["name"] for x in (data.get("results") or data)]
     assert names == ["Zeta Steel"]
+
+
+@pytest.mark.parametrize("existing, duplicate, message", [
+    ({"name": "Acme", "phone": "0801"}, {"name": "ACME", "phone": "0801"},
+     "Supplier with same name & phone already exists."),
+    ({"name": "Acme", "email": "a@acme.com"}, {"name": "acme", "email": "A@Acme.com"},
+     "Supplier with same name & email already exists."),
+    ({"name": "Acme", "rc_number": "RC9"}, {"name": "Other", "rc_number": "rc9"},
+     "RC number already exists for another supplier."),
+    ({"name": "Acme", "tax_id": "TIN-9"}, {"name": "Other", "tax_id": "tin-9"},
+     "Tax ID already exists for another supplier."),
+])
+def test_duplicate_supplier_messages(auth, existing, duplicate, message):
+    url = reverse("suppliers-list")
+    assert auth.post(url, existing, format="json").status_code == 201
+
+    r = auth.post(url, duplicate, format="json")
+    assert r.status_code == 400
+    assert r.json() == [message]
+
+    # an update that collides is rejected the same way
+    other = auth.post(url, {"name": "Unrelated"}, format="json").json()["id"]
+    r = auth.patch(reverse("suppliers-detail", args=[other]), duplicate, format="json")
+    assert r.status_code == 400
+    assert r.json() == [message]
@@ -1,11 +1,12 @@
 # procurement/views.py
 from __future__ import annotations
 
-import hashlib
 from io import BytesIO
-from django.db import models
+from tempfile import SpooledTemporaryFile
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
-from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.http import FileResponse
 
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiTypes, OpenApiResponse
 from PIL import Image, UnidentifiedImageError, ImageFile  # Pillow
@@ -19,23 +20,26 @@ from accounts.views import COMMON_4XX
 from .models import (
     Supplier,
     LPO,
+    LPOItem,
     LPOAttachment,
     GoodsReceipt,
     AuditLog,
-    LPOSequence,  # yearly counter
 )
 from .permissions import LPOReadPolicy, LPOWritePolicy
-from core.roles import is_manager_or_owner, in_groups, is_owner
+from core.files import HashingBuffer, jpeg_upload_name, load_upload_image, upload_checksum
+from core.roles import role_for
 from .serializers import (
     SupplierSerializer,
     LPOSerializer,
     LPOAttachmentSerializer,
     GoodsReceiptSerializer,
 )
-from .services import render_lpo_pdf_bytes
+from .services import cache_rendered_pdf, pdf_cache_key, render_lpo_pdf_to_file
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True  # tolerate truncated streams safely
 
+PDF_SPOOL_MAX_BYTES = 10 * 1024 * 1024
+
 
 class PDFRenderer(renderers.BaseRenderer):
     media_type = "application/pdf"
@@ -47,6 +51,25 @@ class PDFRenderer(renderers.BaseRenderer):
         return data
 
 
+def _create_attachment(**fields) -> tuple[LPOAttachment, bool]:
+    """
+    Insert an attachment, or return the row a concurrent upload of the same file
+    won with (uniq_lpoatt_lpo_checksum). Callers still look for a duplicate first:
+    that skips the storage write, which the INSERT can only follow.
+    """
+    att = LPOAttachment(**fields)
+    try:
+        with transaction.atomic():
+            att.save()
+    except IntegrityError:
+        att.file.delete(save=False)  # stored by pre_save before the INSERT failed
+        existing = LPOAttachment.objects.filter(lpo=att.lpo, checksum=att.checksum).first()
+        if existing is None:
+            raise
+        return existing, False
+    return att, True
+
+
 # ---------- Supplier ----------
 @extend_schema_view(
     list=extend_schema(tags=["Procurement / Suppliers"],  operation_id="supplier_list",           summary="List suppliers",
@@ -91,23 +114,24 @@ class SupplierViewSet(viewsets.ModelViewSet):
                           responses={204: OpenApiResponse(description="No content"), **COMMON_4XX}),
 )
 class LPOViewSet(viewsets.ModelViewSet):
-    queryset = (
-        LPO.objects.select_related("supplier", "approved_by", "created_by", "submitted_by")
-        .prefetch_related("items", "attachments")
-        .all()
-    )
+    queryset = LPOSerializer.setup_eager_loading(LPO.objects.all())
     serializer_class = LPOSerializer
-    # READ is allowed per-object by LPOReadPolicy; writes checked below with LPOWritePolicy
+    # READ is allowed per-object by LPOReadPolicy; writes add LPOWritePolicy (get_permissions)
     permission_classes = [permissions.IsAuthenticated, LPOReadPolicy]
+    WRITE_POLICY_ACTIONS = {"update", "partial_update", "destroy", "submit"}
+    UNSERIALIZED_ACTIONS = {"submit", "approve", "cancel", "destroy", "attachments", "delete_attachment", "summary"}
 
     def get_permissions(self):
         if self.action == "approve":
             from rest_framework.permissions import BasePermission
             class _MgrOrOwner(BasePermission):
                 def has_permission(self, request, view):
-                    return is_manager_or_owner(request.user)
+                    return role_for(request, "manager_or_owner")
             return [permissions.IsAuthenticated(), _MgrOrOwner()]
 
+        if self.action in self.WRITE_POLICY_ACTIONS:
+            return [permissions.IsAuthenticated(), LPOReadPolicy(), LPOWritePolicy()]
+
         if self.action == "cancel":
             from rest_framework.permissions import BasePermission
             class _SuperOnly(BasePermission):
@@ -119,15 +143,18 @@ class LPOViewSet(viewsets.ModelViewSet):
 
     # ---- filters / scope ----
     def get_queryset(self):
-        qs = (
-            LPO.objects.select_related("supplier", "approved_by", "created_by", "submitted_by")
-            .prefetch_related("items", "attachments")
-            .filter(deleted=False)
-            .order_by("-created_at")
-        )
+        qs = LPO.objects.filter(deleted=False).order_by("-created_at")
+        # state changes and attachment endpoints only read the LPO row itself;
+        # the PDF needs the supplier, approver and items, but not the received totals
+        if self.action == "pdf":
+            qs = qs.select_related("supplier", "approved_by").prefetch_related(
+                models.Prefetch("items", queryset=LPOItem.objects.select_related("inventory_item").order_by("pk"))
+            )
+        elif self.action not in self.UNSERIALIZED_ACTIONS:
+            qs = LPOSerializer.setup_eager_loading(qs)
     
         # Scope: managers/owners see all; staff only their own
-        if not is_manager_or_owner(self.request.user):
+        if not role_for(self.request, "manager_or_owner"):
             qs = qs.filter(created_by=self.request.user)
     
         # Filters
@@ -148,20 +175,13 @@ class LPOViewSet(viewsets.ModelViewSet):
     
         return qs
 
-    # ---- create: set creator + yearly sequence number ----
+    # ---- create: set creator; LPOSerializer.create() takes the yearly number ----
     def perform_create(self, serializer):
-        from django.utils import timezone
-        from django.db import transaction
+        # next_lpo_number() advances the sequence row with one UPDATE ... RETURNING
+        # (no select_for_update round trip); the atomic block rolls it back with the LPO
         with transaction.atomic():
-            year = timezone.now().year
-            seq, _ = LPOSequence.objects.select_for_update().get_or_create(year=year)
-            seq.counter += 1
-            seq.save(update_fields=["counter"])
-            number = f"LPO-{year}-{seq.counter:06d}"
-
-            lpo = serializer.save(created_by=self.request.user, lpo_number=number)
-            lpo.recompute_totals()
-            lpo.save(update_fields=["subtotal", "grand_total"])
+            # LPOSerializer.create() already recomputes and saves the totals
+            lpo = serializer.save(created_by=self.request.user)
 
             AuditLog.objects.create(
                 actor=self.request.user,
@@ -176,60 +196,25 @@ class LPOViewSet(viewsets.ModelViewSet):
     # ---- safe reads (object-level LPOReadPolicy already applied) ----
     # (DRF's retrieve uses get_queryset + LPOReadPolicy, so no override is strictly required.)
 
-    # ---- updates: enforce LPOWritePolicy per object ----
-    def update(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if not LPOWritePolicy().has_object_permission(request, self, obj):
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You cannot modify this LPO.")
-
-        response = super().update(request, *args, **kwargs)
-
-        # ⬇️ NEW: write audit
-        try:
-            # prefer validated data if serializer is present
-            payload = getattr(self, "serializer_class", None)
-            payload = request.data  # simple + robust
-            AuditLog.objects.create(
-                actor=request.user,
-                verb="update",
-                lpo=obj,
-                payload=payload,
-            )
-        except Exception:
-            pass
-
-        return response
-
-    def partial_update(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if not LPOWritePolicy().has_object_permission(request, self, obj):
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You cannot modify this LPO.")
-
-        response = super().partial_update(request, *args, **kwargs)
-
-        # ⬇️ NEW: write audit
+    # ---- updates: LPOWritePolicy runs in get_object() (see get_permissions) ----
+    def perform_update(self, serializer):
+        serializer.save()
         try:
             AuditLog.objects.create(
-                actor=request.user,
+                actor=self.request.user,
                 verb="update",
-                lpo=obj,
-                payload=request.data,
+                lpo=serializer.instance,
+                payload=self.request.data,  # simple + robust
             )
         except Exception:
             pass
 
-        return response
     # ---- actions ----
     @extend_schema(tags=["Procurement / LPO"], operation_id="lpo_submit", summary="Submit LPO",
                    responses={200: OpenApiTypes.OBJECT, **COMMON_4XX})
     @action(detail=True, methods=["post"])
     def submit(self, request, pk=None):
         lpo = self.get_object()
-        if not LPOWritePolicy().has_object_permission(request, self, lpo):
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You cannot submit this LPO.")
         if lpo.status != "draft":
             return Response({"detail": "Only draft LPO can be submitted."}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -237,14 +222,15 @@ class LPOViewSet(viewsets.ModelViewSet):
         if hasattr(lpo, "submit"):
             lpo.submit(request.user)  # should set submitted_at
             lpo.submitted_by = request.user
-            lpo.save(update_fields=["status", "submitted_by", "submitted_at"])
         else:
             lpo.status = "submitted"
             lpo.submitted_by = request.user
             lpo.submitted_at = timezone.now()
-            lpo.save(update_fields=["status", "submitted_by", "submitted_at"])
 
-        AuditLog.objects.create(actor=request.user, verb="submitted", lpo=lpo)
+        # the status change and its audit row commit together
+        with transaction.atomic():
+            lpo.save(update_fields=["status", "submitted_by", "submitted_at"])
+            AuditLog.objects.create(actor=request.user, verb="submitted", lpo=lpo)
         return Response({"status": lpo.status})
     
     @extend_schema(tags=["Procurement / LPO"], operation_id="lpo_approve", summary="Approve LPO",
@@ -263,8 +249,9 @@ class LPOViewSet(viewsets.ModelViewSet):
                 if hasattr(lpo, "approved_at"):
                     lpo.approved_at = timezone.now()
             fields = ["status", "approved_at", "approved_by"] if hasattr(lpo, "approved_at") else ["status", "approved_by"]
-            lpo.save(update_fields=[f for f in fields if hasattr(lpo, f)])
-            AuditLog.objects.create(actor=request.user, verb="approved", lpo=lpo)
+            with transaction.atomic():
+                lpo.save(update_fields=[f for f in fields if hasattr(lpo, f)])
+                AuditLog.objects.create(actor=request.user, verb="approved", lpo=lpo)
             return Response({"status": lpo.status})
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -281,8 +268,9 @@ class LPOViewSet(viewsets.ModelViewSet):
                 lpo.cancel(request.user)
             else:
                 lpo.status = "cancelled"
-            lpo.save(update_fields=["status"])
-            AuditLog.objects.create(actor=request.user, verb="cancelled", lpo=lpo)
+            with transaction.atomic():
+                lpo.save(update_fields=["status"])
+                AuditLog.objects.create(actor=request.user, verb="cancelled", lpo=lpo)
             return Response({"status": lpo.status})
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -327,7 +315,7 @@ class LPOViewSet(viewsets.ModelViewSet):
         if not f:
             return Response({"detail": "No file"}, status=400)
 
-        if not lpo.is_editable and not is_manager_or_owner(request.user):
+        if not lpo.is_editable and not role_for(request, "manager_or_owner"):
             return Response({"detail": "Attachments locked after approval."}, status=403)
 
         allowed = set(getattr(settings, "ALLOWED_ATTACHMENT_CONTENT_TYPES", [])) or {
@@ -343,34 +331,26 @@ class LPOViewSet(viewsets.ModelViewSet):
         # IMAGES → compress to JPEG
         if ctype.startswith("image/"):
             try:
-                img = Image.open(f)
-                img.verify()
-                f.seek(0)
-                img = Image.open(f).convert("RGB")
+                img = load_upload_image(f, int(getattr(settings, "IMAGE_MAX_DIM", 2000)))
 
-                MAX_DIM = int(getattr(settings, "IMAGE_MAX_DIM", 2000))
-                img.thumbnail((MAX_DIM, MAX_DIM))
-
-                buf = BytesIO()
+                buf = HashingBuffer()
                 img.save(buf, format="JPEG", quality=80, optimize=True)
-                data = buf.getvalue()
 
                 MAX_IMG_KB = int(getattr(settings, "MAX_IMAGE_UPLOAD_KB", 300))
-                size_kb = round(len(data) / 1024, 1)
+                size_kb = round(buf.tell() / 1024, 1)
                 if size_kb > MAX_IMG_KB:
                     return Response(
                         {"detail": f"Image too large after compression ({size_kb}KB > {MAX_IMG_KB}KB)."},
                         status=400,
                     )
 
-                checksum = hashlib.md5(data).hexdigest()
+                checksum = buf.hexdigest()
                 existing = LPOAttachment.objects.filter(lpo=lpo, checksum=checksum).first()
                 if existing:
                     return Response(LPOAttachmentSerializer(existing).data, status=200)
 
-                safe_name = (getattr(f, "name", "upload") or "upload").rsplit(".", 1)[0] + ".jpg"
-                content = ContentFile(data, name=safe_name)
-                att = LPOAttachment.objects.create(
+                content = buf.as_file(jpeg_upload_name(f))
+                att, created = _create_attachment(
                     lpo=lpo,
                     file=content,
                     kind=kind,
@@ -380,7 +360,7 @@ class LPOViewSet(viewsets.ModelViewSet):
                     height=img.height,
                     checksum=checksum,
                 )
-                return Response(LPOAttachmentSerializer(att).data, status=201)
+                return Response(LPOAttachmentSerializer(att).data, status=201 if created else 200)
 
             except UnidentifiedImageError:
                 return Response({"detail": "Invalid image file."}, status=400)
@@ -393,23 +373,21 @@ class LPOViewSet(viewsets.ModelViewSet):
             size = getattr(f, "size", None)
             if size and size > max_mb * 1024 * 1024:
                 return Response({"detail": f"PDF too large (max {max_mb}MB)."}, status=400)
-            raw = f.read()
-            f.seek(0)
-            checksum = hashlib.md5(raw).hexdigest()
+            checksum = upload_checksum(f)
 
             existing = LPOAttachment.objects.filter(lpo=lpo, checksum=checksum).first()
             if existing:
                 return Response(LPOAttachmentSerializer(existing).data, status=200)
 
-            att = LPOAttachment.objects.create(
+            att, created = _create_attachment(
                 lpo=lpo,
                 file=f,
                 kind=kind,
                 mime_type="application/pdf",
-                size_kb=round((size or len(raw)) / 1024, 1),
+                size_kb=round(f.size / 1024, 1),
                 checksum=checksum,
             )
-            return Response(LPOAttachmentSerializer(att).data, status=201)
+            return Response(LPOAttachmentSerializer(att).data, status=201 if created else 200)
 
         return Response({"detail": "Unsupported file type."}, status=400)
 
@@ -420,10 +398,18 @@ class LPOViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], renderer_classes=[PDFRenderer], url_path="pdf")
     def pdf(self, request, pk=None):
         lpo = self.get_object()
-        data = render_lpo_pdf_bytes(lpo)
-        resp = Response(data, content_type="application/pdf")
-        resp["Content-Disposition"] = f'inline; filename="{lpo.lpo_number}.pdf"'
-        return resp
+        filename = f"{lpo.lpo_number}.pdf"
+        # approval also fills this from tasks.email_approved_lpo, which renders it anyway
+        data = cache.get(pdf_cache_key(lpo))
+        if data is not None:
+            return FileResponse(BytesIO(data), filename=filename, content_type="application/pdf")
+
+        # spooled: stays in memory for typical LPOs, rolls over to disk for large ones
+        tmp = SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES)
+        if render_lpo_pdf_to_file(lpo, tmp):
+            cache_rendered_pdf(lpo, tmp)
+        tmp.seek(0)
+        return FileResponse(tmp, filename=filename, content_type="application/pdf")
 
     @extend_schema(tags=["Procurement / LPO"], operation_id="lpo_delete_attachment",
                    summary="Delete LPO attachment",
@@ -435,26 +421,23 @@ class LPOViewSet(viewsets.ModelViewSet):
         if not att:
             return Response({"detail": "Not found."}, status=404)
         # lock after approval unless Manager/Owner
-        if not getattr(lpo, "is_editable", True) and not is_manager_or_owner(request.user):
+        if not getattr(lpo, "is_editable", True) and not role_for(request, "manager_or_owner"):
             return Response({"detail": "Attachments locked after approval."}, status=403)
         att.delete()
         return Response(status=204)
 
     def destroy(self, request, *args, **kwargs):
         lpo = self.get_object()
-        if not LPOWritePolicy().has_object_permission(request, self, lpo):
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You cannot delete this LPO.")
 
         lpo.deleted = True
-        lpo.save(update_fields=["deleted"])
-
-        AuditLog.objects.create(
-            actor=request.user,
-            verb="soft_delete",
-            lpo=lpo,
-            payload={"lpo_number": lpo.lpo_number},
-        )
+        with transaction.atomic():
+            lpo.save(update_fields=["deleted"])
+            AuditLog.objects.create(
+                actor=request.user,
+                verb="soft_delete",
+                lpo=lpo,
+                payload={"lpo_number": lpo.lpo_number},
+            )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @extend_schema(tags=["Procurement / LPO"], operation_id="lpo_summary",
@@ -463,8 +446,9 @@ class LPOViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], url_path="summary", permission_classes=[permissions.IsAuthenticated])
     def summary(self, request):
         qs = self.get_queryset()  # already role-scoped
-        counts = qs.values_list("status").order_by().annotate(c=models.Count("id"))
-        return Response({"total": qs.count(), "by_status": dict(counts)})
+        # one GROUP BY scan; the total is the sum of the groups rather than a second COUNT
+        by_status = dict(qs.values_list("status").order_by().annotate(c=models.Count("id")))
+        return Response({"total": sum(by_status.values()), "by_status": by_status})
     
 # ---------- GRN ----------
 @extend_schema_view(
@@ -58,6 +58,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.HealthCheckMiddleware',  # probes skip the rest of the stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -167,6 +168,9 @@ if POSTGRES_HOST:
             'PASSWORD': POSTGRES_PASSWORD,
             'HOST': POSTGRES_HOST,
             'PORT': POSTGRES_PORT,
+            # .iterator() streams through server-side cursors (CSV export); set to 1 behind
+            # a transaction-pooling PgBouncer, which cannot hold cursors across statements
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('POSTGRES_DISABLE_SERVER_SIDE_CURSORS') == '1',
         }
     }
 else:
@@ -229,6 +233,16 @@ MAX_PDF_UPLOAD_MB = int(os.getenv("MAX_PDF_UPLOAD_MB", "5"))
 IMAGE_MAX_DIM = int(os.getenv("IMAGE_MAX_DIM", "2000"))
 SACSOL_LPO_PREFIX = os.getenv("SACSOL_LPO_PREFIX", "LPO")
 SACSOL_SUPPLIER_PREFIX = os.getenv("SACSOL_SUPPLIER_PREFIX", "SUP")
+# LPO/supplier numbers reserved per trip to the sequence row; >1 allows gaps and out-of-order numbers across workers
+SACSOL_SEQUENCE_BLOCK_SIZE = int(os.getenv("SACSOL_SEQUENCE_BLOCK_SIZE", "1"))
+# run procurement background jobs (supplier emails) inline instead of on the task pool
+SACSOL_TASKS_EAGER = os.getenv("SACSOL_TASKS_EAGER", "false").lower() == "true"
+# threads per process rendering/emailing approved LPOs; raise for end-of-day approval bursts
+SACSOL_TASK_WORKERS = int(os.getenv("SACSOL_TASK_WORKERS", "2"))
+# approved-LPO PDFs larger than this are stored and linked in the supplier email instead of
+# attached, when the storage serves absolute URLs; linked copies are deleted after the retention
+SACSOL_LPO_PDF_ATTACH_MAX_KB = int(os.getenv("SACSOL_LPO_PDF_ATTACH_MAX_KB", "2048"))
+SACSOL_LPO_PDF_LINK_DAYS = int(os.getenv("SACSOL_LPO_PDF_LINK_DAYS", "30"))
 SITE_URL = os.getenv("SITE_URL")
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL")
 MAX_IMAGE_UPLOAD_KB = int(os.getenv("MAX_IMAGE_UPLOAD_KB", "300"))
@@ -28,7 +28,6 @@ urlpatterns = [
     path("api/", include("inventory.urls")),
     path("api/", include("accounts.urls")),
     path("api/", include("procurement.urls")),
-    path("api/", include("core.urls")),
 ]
 
 if settings.DEBUG: